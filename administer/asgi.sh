@@ -0,0 +1,25 @@
+#!/bin/bash
+set -e
+
+python3 <<END
+import socket
+import time
+
+
+def wait_for_port(host, port, timeout=1):
+    print(f"⏳ Waiting for {host}:{port} to become available...")
+    while True:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            try:
+                sock.connect((host, port))
+                print(f"✅ Connected to {host}:{port}")
+                return
+            except (socket.timeout, ConnectionRefusedError):
+                time.sleep(1)
+
+
+wait_for_port("cf_lib_web", 80)
+END
+
+uvicorn library_system.asgi:application --host 0.0.0.0 --port 80 --workers "${ASGI_WORKERS:-4}"
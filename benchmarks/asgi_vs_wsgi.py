@@ -0,0 +1,102 @@
+"""Compare the WSGI (DRF) and ASGI (async) read paths under concurrency.
+
+Start the stack with ``make b`` and run from inside the web container:
+
+    python -m benchmarks.asgi_vs_wsgi --concurrency 128 --requests 5000
+"""
+
+import argparse
+import http.client
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from library.models import Author, Book
+
+ENDPOINTS = [
+    ("/api/books/", "/api/async/books/"),
+    ("/api/books/{book}/", "/api/async/books/{book}/"),
+    ("/api/authors/", "/api/async/authors/"),
+    ("/api/authors/{author}/", "/api/async/authors/{author}/"),
+    ("/api/top-active-members/", "/api/async/top-active-members/"),
+]
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def hammer(base_url, path, total, concurrency, host):
+    target = urlsplit(base_url)
+
+    def worker(count):
+        connection = http.client.HTTPConnection(target.hostname, target.port or 80)
+        latencies, errors = [], 0
+        for _ in range(count):
+            started = time.perf_counter()
+            try:
+                connection.request("GET", path, headers={"Host": host})
+                response = connection.getresponse()
+                response.read()
+                errors += response.status != 200
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                connection.close()
+            latencies.append(time.perf_counter() - started)
+        connection.close()
+        return latencies, errors
+
+    shares = [
+        total // concurrency + (i < total % concurrency) for i in range(concurrency)
+    ]
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, shares))
+    elapsed = time.perf_counter() - began
+
+    latencies = [latency for result in results for latency in result[0]]
+    return {
+        "requests": len(latencies),
+        "errors": sum(result[1] for result in results),
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--wsgi-url", default="http://cf_lib_web:80")
+    parser.add_argument("--asgi-url", default="http://cf_lib_asgi:80")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2000, help="per endpoint")
+    parser.add_argument(
+        "--host", default="localhost", help="Host header, must be in ALLOWED_HOSTS"
+    )
+    args = parser.parse_args()
+
+    ids = {
+        "book": Book.objects.values_list("id", flat=True).first(),
+        "author": Author.objects.values_list("id", flat=True).first(),
+    }
+    if None in ids.values():
+        raise SystemExit("Seed some books first, e.g. with `python suite.py`")
+
+    load = (args.requests, args.concurrency, args.host)
+    report = []
+    for wsgi_path, asgi_path in ENDPOINTS:
+        wsgi_path, asgi_path = wsgi_path.format(**ids), asgi_path.format(**ids)
+        report.append(
+            {
+                "endpoint": wsgi_path,
+                "wsgi": hammer(args.wsgi_url, wsgi_path, *load),
+                "asgi": hammer(args.asgi_url, asgi_path, *load),
+            }
+        )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
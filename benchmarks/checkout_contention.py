@@ -0,0 +1,104 @@
+"""Hammer a single title with concurrent checkouts and verify nothing oversells.
+
+Run against the Postgres database from the docker setup:
+
+    python -m benchmarks.checkout_contention --threads 32 --copies 500
+"""
+
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.db import connection
+
+from library import circulation
+from library.models import Author, Loan, Member
+from suite import create_author, create_book, create_member, create_user
+
+PREFIX = "bench-contention"
+
+
+def seed(copies, members):
+    author = create_author("Bench", "Contention")
+    book = create_book(f"{PREFIX} title", author, "9990000000001", "fiction", copies)
+    member_ids = [
+        create_member(create_user(f"{PREFIX}-{i}", f"{PREFIX}-{i}@example.com")).id
+        for i in range(members)
+    ]
+    return book, member_ids
+
+
+def cleanup():
+    Author.objects.filter(first_name="Bench", last_name="Contention").delete()
+    Member.objects.filter(user__username__startswith=PREFIX).delete()
+    User.objects.filter(username__startswith=PREFIX).delete()
+
+
+def worker(book_id, member_ids, attempts, start):
+    loaned = refused = 0
+    start.wait()
+    try:
+        for i in range(attempts):
+            try:
+                circulation.checkout(book_id, member_ids[i % len(member_ids)])
+                loaned += 1
+            except circulation.NoCopiesAvailable:
+                refused += 1
+    finally:
+        connection.close()
+    return loaned, refused
+
+
+def run(threads, copies, attempts, members):
+    cleanup()
+    book, member_ids = seed(copies, members)
+    start = threading.Barrier(threads)
+
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [
+            pool.submit(worker, book.id, member_ids, attempts, start)
+            for _ in range(threads)
+        ]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - began
+
+    loaned = sum(result[0] for result in results)
+    refused = sum(result[1] for result in results)
+    book.refresh_from_db()
+    loans = Loan.objects.filter(book=book).count()
+    report = {
+        "threads": threads,
+        "copies": copies,
+        "attempts": threads * attempts,
+        "loaned": loaned,
+        "refused": refused,
+        "loans_in_db": loans,
+        "copies_left": book.available_copies,
+        "oversold": loans > copies or loaned + book.available_copies != copies,
+        "seconds": round(elapsed, 3),
+        "checkouts_per_sec": round((loaned + refused) / elapsed, 1),
+    }
+    cleanup()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--copies", type=int, default=200)
+    parser.add_argument("--attempts", type=int, default=25, help="per thread")
+    parser.add_argument("--members", type=int, default=50)
+    args = parser.parse_args()
+
+    report = run(args.threads, args.copies, args.attempts, args.members)
+    print(json.dumps(report, indent=2))
+    if report["oversold"]:
+        raise SystemExit("Oversold copies under contention")
+
+
+if __name__ == "__main__":
+    main()
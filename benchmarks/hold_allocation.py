@@ -0,0 +1,120 @@
+"""Return copies of one title from many threads while thousands of holds wait.
+
+Every return must hand its copy to a different hold, oldest first. Run
+against the Postgres database from the docker setup:
+
+    python -m benchmarks.hold_allocation --threads 16 --loans 400 --holds 5000
+"""
+
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Count
+
+from library import circulation
+from library.models import Author, Hold, Loan, Member
+from suite import create_author, create_book, create_member, create_user
+
+PREFIX = "bench-holds"
+
+
+def seed(loans, holds):
+    author = create_author("Bench", "Holds")
+    book = create_book(f"{PREFIX} title", author, "9990000000002", "fiction", 0)
+    borrowers = [
+        create_member(create_user(f"{PREFIX}-b{i}", f"{PREFIX}-b{i}@example.com"))
+        for i in range(loans)
+    ]
+    Loan.objects.bulk_create(Loan(book=book, member=member) for member in borrowers)
+    waiting = [
+        create_member(create_user(f"{PREFIX}-h{i}", f"{PREFIX}-h{i}@example.com"))
+        for i in range(holds)
+    ]
+    Hold.objects.bulk_create(Hold(book=book, member=member) for member in waiting)
+    return book, [member.id for member in borrowers]
+
+
+def cleanup():
+    Author.objects.filter(first_name="Bench", last_name="Holds").delete()
+    Member.objects.filter(user__username__startswith=PREFIX).delete()
+    User.objects.filter(username__startswith=PREFIX).delete()
+
+
+def worker(book_id, member_ids, start):
+    returned = 0
+    start.wait()
+    try:
+        for member_id in member_ids:
+            circulation.return_book(book_id, member_id)
+            returned += 1
+    finally:
+        connection.close()
+    return returned
+
+
+def run(threads, loans, holds):
+    cleanup()
+    book, member_ids = seed(loans, holds)
+    start = threading.Barrier(threads)
+
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [
+            pool.submit(worker, book.id, member_ids[i::threads], start)
+            for i in range(threads)
+        ]
+        returned = sum(future.result() for future in futures)
+    elapsed = time.perf_counter() - began
+
+    book.refresh_from_db()
+    allocated = Hold.objects.filter(book=book, allocated_at__isnull=False)
+    allocated_ids = list(allocated.order_by("id").values_list("id", flat=True))
+    oldest_ids = list(
+        Hold.objects.filter(book=book).order_by("id").values_list("id", flat=True)
+    )[: len(allocated_ids)]
+    doubled = (
+        Loan.objects.filter(book=book, hold__isnull=False)
+        .values("member")
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)
+        .count()
+    )
+    expected = min(returned, holds)
+    report = {
+        "threads": threads,
+        "returns": returned,
+        "holds": holds,
+        "allocated": len(allocated_ids),
+        "copies_on_shelf": book.available_copies,
+        "double_allocations": doubled,
+        "fifo": allocated_ids == oldest_ids,
+        "consistent": len(allocated_ids) == expected
+        and book.available_copies == returned - expected
+        and doubled == 0,
+        "seconds": round(elapsed, 3),
+        "allocations_per_sec": round(len(allocated_ids) / elapsed, 1),
+    }
+    cleanup()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--loans", type=int, default=200, help="copies returned")
+    parser.add_argument("--holds", type=int, default=2000)
+    args = parser.parse_args()
+
+    report = run(args.threads, args.loans, args.holds)
+    print(json.dumps(report, indent=2))
+    if not report["consistent"]:
+        raise SystemExit("Holds were lost or allocated twice under contention")
+
+
+if __name__ == "__main__":
+    main()
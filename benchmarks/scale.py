@@ -0,0 +1,471 @@
+"""Seed a large, reproducible dataset and measure every endpoint against it.
+
+Seeding uses bulk inserts and the same random seed every time, so two runs
+against the same volumes see the same data:
+
+    python -m benchmarks.scale --seed --authors 100000 --books 1000000 \\
+        --loans 5000000 --members 50000
+
+Later runs reuse the data. Each endpoint gets ``--requests`` requests spread
+over ``--concurrency`` threads, in process through Django's test client or,
+with ``--base-url``, over HTTP. Queries per request come from the
+``Server-Timing`` header. ``check_overdue_loans`` is timed the same way, as
+``--concurrency`` ticks at once over ``--overdue-rounds`` re-armed rounds.
+``--save-baseline`` stores the report and later runs are compared against it;
+a regression beyond ``--tolerance`` exits non-zero. Every route in
+``library_system/urls.py`` must have an ``ENDPOINTS`` entry.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from datetime import timedelta
+from itertools import islice
+from urllib.parse import urlsplit
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.models import Max, Min
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver, resolve
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from library import cache, overdue
+from library.models import Author, Book, Hold, Loan, Member
+from library.tasks import check_overdue_loans
+from suite import (
+    create_author,
+    create_book,
+    create_loan,
+    create_member,
+    create_user,
+    make_api_request,
+)
+
+PREFIX = "scale"
+GENRES = [value for value, _ in Book.GENRE_CHOICES]
+BASELINE = os.path.join(os.path.dirname(__file__), "scale_baseline.json")
+QUERIES = re.compile(r'desc="(\d+) queries"')
+WAITLIST_ISBN = "7000000000000"
+
+ENDPOINTS = [
+    ("GET", "/metrics"),
+    ("GET", "/api/"),
+    ("GET", "/api/authors/"),
+    ("GET", "/api/authors/{author}/"),
+    ("GET", "/api/books/"),
+    ("GET", "/api/books/?pagination=cursor"),
+    ("GET", "/api/books/?genre=fiction"),
+    ("GET", "/api/books/{book}/"),
+    ("GET", "/api/books/search/?q=scale+title+7"),
+    ("GET", "/api/books/export/?genre=biography&author__last_name=Scale7"),
+    ("GET", "/api/books/availability/?id={book}&isbn=" + WAITLIST_ISBN),
+    ("GET", "/api/members/"),
+    ("GET", "/api/members/{member}/"),
+    ("GET", "/api/loans/"),
+    ("GET", "/api/loans/?is_returned=false"),
+    ("GET", "/api/loans/{loan}/"),
+    ("GET", "/api/loans/export/?member={member}"),
+    ("GET", "/api/top-active-members/"),
+    ("GET", "/api/stats/circulation/?by=genre"),
+    ("GET", "/api/async/books/"),
+    ("GET", "/api/async/books/{book}/"),
+    ("GET", "/api/async/authors/"),
+    ("GET", "/api/async/authors/{author}/"),
+    ("GET", "/api/async/top-active-members/"),
+    ("POST", "/api/authors/"),
+    ("POST", "/api/authors/batch/"),
+    ("PATCH", "/api/books/batch/"),
+    ("POST", "/api/books/{book}/loan/"),
+    ("POST", "/api/books/{book}/return_book/"),
+    ("POST", "/api/books/{waitlist}/hold/"),
+    ("POST", "/api/loans/bulk_checkout/"),
+    ("POST", "/api/loans/{loan}/extend_due_date/"),
+]
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def seed(args):
+    """Bulk insert the requested volumes on top of a few ``suite`` fixtures."""
+    rng = random.Random(args.random_seed)
+    today = timezone.now().date()
+    started = time.perf_counter()
+
+    # One of each through the suite helpers; they anchor the detail endpoints.
+    anchor_author = create_author(f"{PREFIX}-anchor", "Scale")
+    anchor_book = create_book(
+        f"{PREFIX} anchor", anchor_author, "8000000000000", "fiction", 1000000
+    )
+    anchor_member = create_member(
+        create_user(f"{PREFIX}-anchor", f"{PREFIX}-anchor@example.com")
+    )
+    create_loan(anchor_book, anchor_member, today + timedelta(days=14))
+
+    User.objects.bulk_create(
+        (
+            User(username=f"{PREFIX}-{i}", email=f"{PREFIX}-{i}@example.com")
+            for i in range(args.members)
+        ),
+        batch_size=args.batch_size,
+    )
+    for users in batches(
+        User.objects.filter(username__startswith=f"{PREFIX}-")
+        .exclude(username=f"{PREFIX}-anchor")
+        .values_list("id", flat=True)
+        .iterator(),
+        args.batch_size,
+    ):
+        Member.objects.bulk_create(Member(user_id=user_id) for user_id in users)
+
+    for authors in batches(range(args.authors), args.batch_size):
+        Author.objects.bulk_create(
+            Author(first_name=f"{PREFIX}-{i}", last_name=f"Scale{i % 100}")
+            for i in authors
+        )
+    first_author, last_author = id_range(Author, first_name__startswith=PREFIX)
+    for books in batches(range(args.books), args.batch_size):
+        Book.objects.bulk_create(
+            Book(
+                title=f"{PREFIX} title {i}",
+                author_id=rng.randint(first_author, last_author),
+                isbn=f"8{i + 1:012d}",
+                genre=rng.choice(GENRES),
+                available_copies=rng.randint(1, 5),
+            )
+            for i in books
+        )
+
+    first_book, last_book = id_range(Book, isbn__startswith="8")
+    first_member, last_member = id_range(Member, user__username__startswith=PREFIX)
+    for loans in batches(range(args.loans), args.batch_size):
+        rows = []
+        for _ in loans:
+            due_date = today + timedelta(days=rng.randint(-60, 14))
+            returned = rng.random() < 0.9
+            rows.append(
+                Loan(
+                    book_id=rng.randint(first_book, last_book),
+                    member_id=rng.randint(first_member, last_member),
+                    due_date=due_date,
+                    is_returned=returned,
+                    return_date=today if returned else None,
+                    remainder_sent=True,
+                )
+            )
+        Loan.objects.bulk_create(rows)
+
+    call_command("rebuild_active_loan_counts", verbosity=0)
+    cache.invalidate("authors", "books")
+    return round(time.perf_counter() - started, 1)
+
+
+def id_range(model, **filters):
+    bounds = model.objects.filter(**filters).aggregate(first=Min("id"), last=Max("id"))
+    if bounds["first"] is None:
+        raise SystemExit(f"No seeded {model.__name__} rows, run with --seed")
+    return bounds["first"], bounds["last"]
+
+
+def targets(args):
+    anchor = Book.objects.get(isbn="8000000000000")
+    member = Member.objects.get(user__username=f"{PREFIX}-anchor")
+    # A book with no copies for the hold endpoint, its queue emptied each run.
+    waitlist, _ = Book.objects.update_or_create(
+        isbn=WAITLIST_ISBN,
+        defaults={
+            "title": f"{PREFIX} waitlist",
+            "author_id": anchor.author_id,
+            "genre": "fiction",
+            "available_copies": 0,
+        },
+    )
+    Hold.objects.filter(book=waitlist).delete()
+    return {
+        "author": anchor.author_id,
+        "book": anchor.id,
+        "title": anchor.title,
+        "waitlist": waitlist.id,
+        "member": member.id,
+        "members": list(
+            Member.objects.filter(user__username__startswith=f"{PREFIX}-")
+            .order_by("id")
+            .values_list("id", flat=True)[: args.requests]
+        ),
+        "loan": Loan.objects.filter(member=member).values_list("id", flat=True)[0],
+    }
+
+
+def payloads(method, path, ids):
+    """The request bodies for an endpoint, used in turn by successive requests."""
+    if path == "/api/authors/" and method == "POST":
+        return [{"first_name": f"{PREFIX}-posted", "last_name": "Scale"}]
+    if path == "/api/authors/batch/":
+        return [[{"first_name": f"{PREFIX}-batch", "last_name": "Scale"}] * 5]
+    if path == "/api/books/batch/":
+        return [[{"id": ids["book"], "title": ids["title"]}]]
+    if path.endswith("/hold/"):
+        # One hold per member and book, so every request queues someone new.
+        return [{"member_id": member_id} for member_id in ids["members"]]
+    if path.endswith(("/loan/", "/return_book/")):
+        return [{"member_id": ids["member"]}]
+    if path.endswith("/bulk_checkout/"):
+        return [[{"book_id": ids["book"], "member_id": ids["member"]}] * 5]
+    if path.endswith("/extend_due_date/"):
+        return [{"additional_days": 0}]
+    return [None]
+
+
+def route_names(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace != "admin":
+                yield from route_names(pattern.url_patterns)
+        elif pattern.name:
+            yield pattern.name
+
+
+def uncovered_routes():
+    """Names of routes in the URLconf that no ``ENDPOINTS`` entry reaches."""
+    covered = {
+        resolve(re.sub(r"\{\w+\}", "1", urlsplit(template).path)).url_name
+        for _, template in ENDPOINTS
+    }
+    return sorted(set(route_names(get_resolver().url_patterns)) - covered)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class InProcess:
+    def __init__(self):
+        self.client = Client()
+
+    def request(self, method, path, data):
+        if method == "GET":
+            response = self.client.get(path)
+        else:
+            response = getattr(self.client, method.lower())(
+                path, json.dumps(data), content_type="application/json"
+            )
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        return response.status_code, response.get("Server-Timing", "")
+
+    def close(self):
+        connections.close_all()
+
+
+class OverHTTP:
+    def __init__(self, base_url, host):
+        target = urlsplit(base_url)
+        self.connection = http.client.HTTPConnection(target.hostname, target.port)
+        self.host = host
+
+    def request(self, method, path, data):
+        headers = {"Host": self.host, "Content-Type": "application/json"}
+        body = None if data is None else json.dumps(data)
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            return 0, ""
+        return response.status, response.getheader("Server-Timing", "")
+
+    def close(self):
+        self.connection.close()
+
+
+def measure(method, path, bodies, args):
+    def worker(first, count):
+        session = OverHTTP(args.base_url, args.host) if args.base_url else InProcess()
+        latencies, queries, errors = [], [], 0
+        try:
+            for number in range(first, first + count):
+                data = bodies[number % len(bodies)]
+                started = time.perf_counter()
+                status_code, timing = session.request(method, path, data)
+                latencies.append(time.perf_counter() - started)
+                errors += not 200 <= status_code < 400
+                if found := QUERIES.search(timing):
+                    queries.append(int(found.group(1)))
+        finally:
+            session.close()
+        return latencies, queries, errors
+
+    total, concurrency = args.requests, args.concurrency
+    shares = [
+        total // concurrency + (i < total % concurrency) for i in range(concurrency)
+    ]
+    firsts = [sum(shares[:i]) for i in range(concurrency)]
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(
+            pool.map(
+                worker,
+                *zip(
+                    *[(first, share) for first, share in zip(firsts, shares) if share]
+                ),
+            )
+        )
+    elapsed = time.perf_counter() - began
+    return summarize(results, elapsed)
+
+
+def summarize(results, elapsed):
+    """Fold per-thread ``(latencies, queries, errors)`` into the report stats."""
+    latencies = [latency for result in results for latency in result[0]]
+    queries = [count for result in results for count in result[1]]
+    return {
+        "requests": len(latencies),
+        "errors": sum(result[2] for result in results),
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "queries_per_request": (
+            round(sum(queries) / len(queries), 2) if queries else None
+        ),
+    }
+
+
+def measure_overdue(args):
+    """Time ``--concurrency`` concurrent overdue ticks per re-armed round."""
+
+    def tick(_):
+        try:
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                stats = check_overdue_loans()
+            latency = time.perf_counter() - started
+        except Exception:
+            return [], [], 1, 0
+        finally:
+            connection.close()
+        return [latency], [len(queries)], 0, stats["sent"]
+
+    results, elapsed = [], 0.0
+    for _ in range(args.overdue_rounds):
+        # Re-arm the reminders so every round sends the same batch.
+        Loan.objects.filter(
+            is_returned=False, due_date__lt=timezone.now().date()
+        ).update(remainder_sent=False, reminder_claimed_at=None)
+        overdue.reset()
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results += pool.map(tick, range(args.concurrency))
+        elapsed += time.perf_counter() - began
+    return {
+        **summarize(results, elapsed),
+        "sent_per_round": sum(result[3] for result in results) // args.overdue_rounds,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Return a line per metric that got worse than ``baseline`` allows."""
+    regressions = []
+    for name, current in report["endpoints"].items():
+        previous = baseline["endpoints"].get(name)
+        if previous is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{name} {metric}: {previous[metric]} -> {current[metric]}"
+                )
+        if current["requests_per_sec"] < previous["requests_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{name} requests_per_sec: {previous['requests_per_sec']} -> "
+                f"{current['requests_per_sec']}"
+            )
+        if (current["queries_per_request"] or 0) > (
+            previous["queries_per_request"] or 0
+        ):
+            regressions.append(
+                f"{name} queries_per_request: {previous['queries_per_request']} -> "
+                f"{current['queries_per_request']}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", action="store_true", help="Insert the dataset")
+    parser.add_argument("--authors", type=int, default=1000)
+    parser.add_argument("--books", type=int, default=10000)
+    parser.add_argument("--loans", type=int, default=50000)
+    parser.add_argument("--members", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="per endpoint")
+    parser.add_argument("--overdue-rounds", type=int, default=5)
+    parser.add_argument(
+        "--base-url", help="Drive a running server instead of the in-process client"
+    )
+    parser.add_argument(
+        "--host", default="localhost", help="Host header, must be in ALLOWED_HOSTS"
+    )
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="Allowed slowdown (0.2 = 20%%)"
+    )
+    args = parser.parse_args()
+    if missing := uncovered_routes():
+        raise SystemExit(f"No ENDPOINTS entry for routes: {', '.join(missing)}")
+
+    report = {"config": vars(args), "volumes": {}, "endpoints": {}}
+    if args.seed:
+        report["seed_seconds"] = seed(args)
+    report["volumes"] = {
+        model.__name__: model.objects.count() for model in (Author, Book, Member, Loan)
+    }
+
+    ids = targets(args)
+    client = APIClient()
+    for method, template in ENDPOINTS:
+        path = template.format(**ids)
+        bodies = payloads(method, path, ids)
+        # Smoke-test once so a broken endpoint is obvious before timing it.
+        if method == "GET" and "/export/" not in path and path != "/metrics":
+            with redirect_stdout(sys.stderr):
+                make_api_request(client, method, path, bodies[0])
+        report["endpoints"][f"{method} {template}"] = measure(
+            method, path, bodies, args
+        )
+    report["endpoints"]["TASK check_overdue_loans"] = measure_overdue(args)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as handle:
+            json.dump(report, handle, indent=2)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as handle:
+            report["regressions"] = compare(report, json.load(handle), args.tolerance)
+
+    print(json.dumps(report, indent=2, default=str))
+    if report.get("regressions"):
+        raise SystemExit(f"{len(report['regressions'])} regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Per-row cost of the DRF serializers versus the values()-based fast path.
+
+Rows are fetched up front in both modes, so only serialization and JSON
+rendering are timed. Needs some data, e.g. from ``benchmarks.scale --seed``:
+
+    python -m benchmarks.serialization --rows 5000 --repeat 5
+"""
+
+import argparse
+import json
+import time
+
+from rest_framework.renderers import JSONRenderer
+
+from library.fast_serializers import row_plan
+from library.mixins import eager_loading_plan
+from library.renderers import FastJSONRenderer
+from library.serializers import (
+    AuthorSerializer,
+    BookSerializer,
+    LoanSerializer,
+    MemberSerializer,
+)
+
+SERIALIZERS = [AuthorSerializer, BookSerializer, MemberSerializer, LoanSerializer]
+
+
+def best_of(repeat, function):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def compare(serializer_class, rows, repeat):
+    model = serializer_class.Meta.model
+    select, prefetch = eager_loading_plan(serializer_class)
+    instances = list(
+        model.objects.select_related(*select)
+        .prefetch_related(*prefetch)
+        .order_by("id")[:rows]
+    )
+    if not instances:
+        return None
+    paths, build = row_plan(serializer_class)
+    values = list(model.objects.order_by("id").values(*paths)[:rows])
+
+    drf = best_of(
+        repeat,
+        lambda: JSONRenderer().render(serializer_class(instances, many=True).data),
+    )
+    fast = best_of(
+        repeat, lambda: FastJSONRenderer().render([build(row) for row in values])
+    )
+    return {
+        "rows": len(instances),
+        "drf_us_per_row": round(drf / len(instances) * 1e6, 2),
+        "fast_us_per_row": round(fast / len(values) * 1e6, 2),
+        "speedup": round(drf / fast, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    report = {
+        serializer_class.__name__: compare(serializer_class, args.rows, args.repeat)
+        for serializer_class in SERIALIZERS
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
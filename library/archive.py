@@ -0,0 +1,46 @@
+"""Move old returned loans from ``Loan`` into ``LoanArchive``.
+
+``Loan`` then only holds active and recently returned loans, which is all
+returns, reminders and due date extensions ever look at. Reads that need the
+full history go through the ``LoanHistory`` view.
+"""
+
+from django.db import connection, transaction
+
+from . import cache
+from .models import Hold, Loan, LoanArchive
+
+FIELDS = ("id", "book_id", "member_id", "loan_date", "due_date", "return_date")
+
+
+def archive_chunk(cutoff, size):
+    """Archive up to ``size`` loans returned before ``cutoff``; return the count.
+
+    Rows are copied and deleted in one transaction, so a loan is always in
+    exactly one of the two tables. SKIP LOCKED lets archivers run side by side.
+    The loans go with one raw ``DELETE`` rather than ``QuerySet.delete()``,
+    whose per-row ``post_delete`` handlers would bump the books cache for each
+    loan. Their side effects are done here instead: holds are detached like
+    ``on_delete=SET_NULL`` would, returned loans hold no active loan count,
+    and the books cache is invalidated once per chunk.
+    """
+    with transaction.atomic():
+        rows = list(
+            Loan.objects.select_for_update(skip_locked=True)
+            .filter(is_returned=True, return_date__lt=cutoff)
+            .order_by("id")
+            .values(*FIELDS)[:size]
+        )
+        if not rows:
+            return 0
+        LoanArchive.objects.bulk_create(LoanArchive(**row) for row in rows)
+        ids = [row["id"] for row in rows]
+        Hold.objects.filter(loan_id__in=ids).update(loan=None)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {Loan._meta.db_table} "
+                f"WHERE id IN ({', '.join(['%s'] * len(ids))})",
+                ids,
+            )
+    cache.invalidate("books")
+    return len(rows)
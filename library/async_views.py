@@ -0,0 +1,124 @@
+"""Async read-only endpoints, served through ``library_system.asgi``.
+
+They return the same payloads as their DRF counterparts: querysets are
+evaluated with the async ORM and the rows, fully loaded, are handed to the
+regular serializers, which then never touch the database.
+"""
+
+from django.conf import settings
+from django.http import JsonResponse
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .models import Author, Book, Member
+from .pagination import LibraryPagination
+from .serializers import AuthorSerializer, BookSerializer
+from .views import TopActiveMembersView, query_limit
+
+
+def not_found():
+    return JsonResponse({"detail": "Not found."}, status=404)
+
+
+def bad_request(message):
+    return JsonResponse({"error": message}, status=400)
+
+
+def page_bounds(request):
+    default = settings.REST_FRAMEWORK["PAGE_SIZE"]
+    try:
+        page = int(request.GET.get("page", 1))
+        page_size = min(
+            int(request.GET.get("page_size", default)), LibraryPagination.max_page_size
+        )
+    except ValueError:
+        raise ValueError("page and page_size must be integers")
+    if page < 1 or page_size < 1:
+        raise ValueError("page and page_size must be positive")
+    return page, page_size
+
+
+async def paginated(request, queryset, serializer_class):
+    try:
+        page, page_size = page_bounds(request)
+    except ValueError as exc:
+        return bad_request(str(exc))
+
+    count = await queryset.acount()
+    start = (page - 1) * page_size
+    if start and start >= count:
+        return JsonResponse({"detail": "Invalid page."}, status=404)
+    rows = [row async for row in queryset[start : start + page_size]]
+
+    url = request.build_absolute_uri()
+    if page == 2:
+        previous = remove_query_param(url, "page")
+    else:
+        previous = replace_query_param(url, "page", page - 1) if page > 1 else None
+    following = (
+        replace_query_param(url, "page", page + 1)
+        if start + page_size < count
+        else None
+    )
+    return JsonResponse(
+        {
+            "count": count,
+            "next": following,
+            "previous": previous,
+            "results": serializer_class(rows, many=True).data,
+        }
+    )
+
+
+async def book_list(request):
+    queryset = Book.objects.select_related("author").order_by("id")
+    for field in ("genre", "author__last_name"):
+        if field in request.GET:
+            queryset = queryset.filter(**{field: request.GET[field]})
+    return await paginated(request, queryset, BookSerializer)
+
+
+async def book_detail(request, pk):
+    try:
+        book = await Book.objects.select_related("author").aget(pk=pk)
+    except Book.DoesNotExist:
+        return not_found()
+    return JsonResponse(BookSerializer(book).data)
+
+
+async def author_list(request):
+    return await paginated(request, Author.objects.order_by("id"), AuthorSerializer)
+
+
+async def author_detail(request, pk):
+    try:
+        author = await Author.objects.aget(pk=pk)
+    except Author.DoesNotExist:
+        return not_found()
+    return JsonResponse(AuthorSerializer(author).data)
+
+
+async def top_active_members(request):
+    try:
+        limit = query_limit(
+            request.GET,
+            TopActiveMembersView.default_limit,
+            TopActiveMembersView.max_limit,
+        )
+    except ValueError as exc:
+        return bad_request(str(exc))
+
+    members = Member.objects.order_by("-active_loans", "id").values(
+        "id", "user__username", "user__email", "active_loans"
+    )[:limit]
+    return JsonResponse(
+        [
+            {
+                "id": member["id"],
+                "username": member["user__username"],
+                "email": member["user__email"],
+                "active_loans": member["active_loans"],
+            }
+            async for member in members
+        ],
+        safe=False,
+    )
@@ -0,0 +1,89 @@
+"""Write-through cache of ``available_copies`` for availability badges.
+
+Each book is cached twice, under its id and under its ISBN, as
+``{"id", "isbn", "available_copies"}``, so a mixed batch of ids and ISBNs is a
+single ``get_many``. Writers refresh the entries of the books they touched
+once their transaction commits, dropping the entry of an ISBN a book no longer
+has; misses are filled from one ``IN`` query.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Book
+
+ID_KEY = "library:availability:id:{}"
+ISBN_KEY = "library:availability:isbn:{}"
+FIELDS = ("id", "isbn", "available_copies")
+
+
+def store(rows):
+    entries = {}
+    for row in rows:
+        entries[ID_KEY.format(row["id"])] = row
+        entries[ISBN_KEY.format(row["isbn"])] = row
+    if entries:
+        cache.set_many(entries, settings.AVAILABILITY_CACHE_TIMEOUT)
+
+
+def lookup(ids=(), isbns=()):
+    """Return ``(rows, missing)`` for the requested ids and ISBNs.
+
+    ``rows`` follow the request order without duplicates; ``missing`` lists
+    the ids and ISBNs that match no book.
+    """
+    keys = [ID_KEY.format(book_id) for book_id in ids]
+    keys += [ISBN_KEY.format(isbn) for isbn in isbns]
+    found = cache.get_many(keys)
+
+    missing_ids = [book_id for book_id in ids if ID_KEY.format(book_id) not in found]
+    missing_isbns = [isbn for isbn in isbns if ISBN_KEY.format(isbn) not in found]
+    if missing_ids or missing_isbns:
+        rows = list(
+            Book.objects.filter(
+                Q(id__in=missing_ids) | Q(isbn__in=missing_isbns)
+            ).values(*FIELDS)
+        )
+        store(rows)
+        for row in rows:
+            found[ID_KEY.format(row["id"])] = row
+            found[ISBN_KEY.format(row["isbn"])] = row
+
+    results, seen, missing = [], set(), []
+    for requested, key in zip([*ids, *isbns], keys):
+        row = found.get(key)
+        if row is None:
+            missing.append(requested)
+        elif row["id"] not in seen:
+            seen.add(row["id"])
+            results.append(row)
+    return results, missing
+
+
+def refresh(book_ids=(), isbns=()):
+    """Re-cache the given books once the current transaction commits."""
+    book_ids, isbns = list(book_ids), list(isbns)
+
+    def write_through():
+        rows = list(
+            Book.objects.filter(Q(id__in=book_ids) | Q(isbn__in=isbns)).values(*FIELDS)
+        )
+        # A cached id entry still holds the ISBN a renamed book was cached under.
+        current = {row["id"]: row["isbn"] for row in rows}
+        cached = cache.get_many([ID_KEY.format(book_id) for book_id in current])
+        cache.delete_many(
+            [
+                ISBN_KEY.format(row["isbn"])
+                for row in cached.values()
+                if row["isbn"] != current[row["id"]]
+            ]
+        )
+        store(rows)
+
+    transaction.on_commit(write_through)
+
+
+def forget(book):
+    cache.delete_many([ID_KEY.format(book.id), ISBN_KEY.format(book.isbn)])
@@ -0,0 +1,153 @@
+"""Create or update many rows from one list payload.
+
+Rows are validated by the viewset's serializer with its per-row queries
+taken out: primary key relations accept plain ids and unique validators are
+dropped. Those checks then run once per batch, as one ``IN`` query per
+relation and per unique field, and valid rows are written with
+``bulk_create``/``bulk_update`` in a single transaction, one ``bulk_update``
+per set of fields the rows send.
+"""
+
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
+
+
+def strip_queries(serializer):
+    """Take per-row lookups out of ``serializer``'s fields.
+
+    Returns the ``(name, field)`` pairs of the removed primary key relations
+    and the ``(name, source, validator)`` triples of the removed unique checks.
+    """
+    relations, uniques = [], []
+    for name, field in list(serializer.fields.items()):
+        if field.read_only:
+            continue
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            relations.append((name, field))
+            options = {"source": field.source} if field.source != name else {}
+            serializer.fields[name] = serializers.IntegerField(
+                required=field.required,
+                allow_null=field.allow_null,
+                write_only=field.write_only,
+                **options,
+            )
+            continue
+        unique = [v for v in field.validators if isinstance(v, UniqueValidator)]
+        if unique:
+            field.validators = [v for v in field.validators if v not in unique]
+            uniques.append((name, field.source, unique[0]))
+    return relations, uniques
+
+
+def check_relations(pending, relations):
+    for name, field in relations:
+        source = field.source
+        ids = {row["data"].get(source) for row in pending} - {None}
+        found = set(
+            field.get_queryset().filter(pk__in=ids).values_list("pk", flat=True)
+        )
+        for row in pending:
+            pk = row["data"].get(source)
+            if pk is not None and pk not in found:
+                message = field.error_messages["does_not_exist"].format(pk_value=pk)
+                row["errors"].setdefault(name, []).append(message)
+
+
+def check_uniques(pending, uniques):
+    for name, source, validator in uniques:
+        values = {row["data"][source] for row in pending if source in row["data"]}
+        owners = dict(
+            validator.queryset.filter(**{f"{source}__in": values}).values_list(
+                source, "pk"
+            )
+        )
+        claimed = set()
+        for row in pending:
+            if source not in row["data"]:
+                continue
+            value = row["data"][source]
+            owner = owners.get(value)
+            if value in claimed or owner not in (None, row["pk"]):
+                row["errors"].setdefault(name, []).append(str(validator.message))
+            claimed.add(value)
+
+
+def write(serializer_class, items, partial=False):
+    """Create ``items``, or update them by ``id`` when ``partial``.
+
+    Returns one result per item in request order, ``{"index", "id"}`` or
+    ``{"index", "errors"}``, and the model instances written. Invalid items
+    are reported and do not affect the others.
+    """
+    serializer = serializer_class(partial=partial)
+    relations, uniques = strip_queries(serializer)
+    model = serializer_class.Meta.model
+
+    rows = []
+    for index, item in enumerate(items):
+        row = {"index": index, "pk": None, "data": {}, "errors": {}}
+        rows.append(row)
+        if partial:
+            row["pk"] = item.get("id") if isinstance(item, dict) else None
+            if isinstance(row["pk"], bool) or not isinstance(row["pk"], int):
+                row["errors"]["id"] = ["A valid integer is required."]
+                continue
+        try:
+            row["data"] = serializer.run_validation(item)
+        except serializers.ValidationError as exc:
+            row["errors"] = exc.detail
+
+    instances = {}
+    if partial:
+        pending = [row for row in rows if not row["errors"]]
+        instances = model.objects.in_bulk({row["pk"] for row in pending})
+        seen = set()
+        for row in pending:
+            if row["pk"] not in instances:
+                row["errors"]["id"] = ["Not found."]
+            elif row["pk"] in seen:
+                row["errors"]["id"] = ["Duplicate id in batch."]
+            seen.add(row["pk"])
+
+    pending = [row for row in rows if not row["errors"]]
+    check_relations(pending, relations)
+    check_uniques(pending, uniques)
+
+    accepted = [row for row in rows if not row["errors"]]
+    relation_sources = {field.source for name, field in relations}
+
+    def assign(instance, data):
+        for source, value in data.items():
+            if source in relation_sources:
+                source = model._meta.get_field(source).attname
+            setattr(instance, source, value)
+        return instance
+
+    with transaction.atomic():
+        if partial:
+            objects = [assign(instances[row["pk"]], row["data"]) for row in accepted]
+            # Rows only write the fields they send: a column another row sets
+            # would otherwise be written back stale from the unlocked read.
+            groups = {}
+            for row, instance in zip(accepted, objects):
+                fields = tuple(sorted(row["data"]))
+                groups.setdefault(fields, []).append(instance)
+            for fields, group in groups.items():
+                if fields:
+                    model.objects.bulk_update(group, fields)
+        else:
+            objects = model.objects.bulk_create(
+                [assign(model(), row["data"]) for row in accepted]
+            )
+
+    for row, instance in zip(accepted, objects):
+        row["pk"] = instance.pk
+    return [
+        (
+            {"index": row["index"], "errors": row["errors"]}
+            if row["errors"]
+            else {"index": row["index"], "id": row["pk"]}
+        )
+        for row in rows
+    ], objects
@@ -0,0 +1,65 @@
+import hashlib
+import json
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags
+
+NAMESPACE_KEY = "library:ns:{}"
+RESPONSE_KEY = "library:response:{}:{}"
+
+# Per-process response cache counters: hits, misses and not_modified.
+stats = Counter()
+
+
+def namespace_versions(names):
+    keys = [NAMESPACE_KEY.format(name) for name in names]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Start from the clock so a namespace evicted from the cache never
+            # comes back at a version that still has entries stored under it.
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump(*names):
+    for name in names:
+        key = NAMESPACE_KEY.format(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def invalidate(*names):
+    """Retire cached responses for ``names`` now and again once committed.
+
+    The second bump drops anything a concurrent reader cached from the
+    pre-commit state between the first bump and the commit.
+    """
+    bump(*names)
+    transaction.on_commit(lambda: bump(*names))
+
+
+def response_key(names, path):
+    versions = ".".join(str(version) for version in namespace_versions(names))
+    return RESPONSE_KEY.format(versions, hashlib.md5(path.encode()).hexdigest())
+
+
+def etag_for(data):
+    payload = json.dumps(data, sort_keys=True, default=str).encode()
+    return f'"{hashlib.md5(payload).hexdigest()}"'
+
+
+def etag_matches(header, etag):
+    """Whether an ``If-None-Match`` header names ``etag``.
+
+    Tags are compared whole and weakly, so ``W/"x"`` matches ``"x"``; ``*``
+    matches any current representation.
+    """
+    tags = parse_etags(header or "")
+    return "*" in tags or etag in (tag.removeprefix("W/") for tag in tags)
@@ -0,0 +1,287 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Exists, F, OuterRef, PositiveIntegerField, When
+from django.utils import timezone
+
+from . import availability, cache, outbox
+from .models import Book, Hold, Loan, Member
+
+
+class CirculationError(Exception):
+    pass
+
+
+class NoCopiesAvailable(CirculationError):
+    def __init__(self):
+        super().__init__("No available copies.")
+
+
+class MemberNotFound(CirculationError):
+    def __init__(self):
+        super().__init__("Member does not exist.")
+
+
+class ActiveLoanNotFound(CirculationError):
+    def __init__(self):
+        super().__init__("Active loan does not exist.")
+
+
+class CopiesAvailable(CirculationError):
+    def __init__(self):
+        super().__init__("Copies are available; loan the book instead.")
+
+
+class AlreadyOnHold(CirculationError):
+    def __init__(self):
+        super().__init__("Member is already waiting for this book.")
+
+
+def member_exists(member_id):
+    try:
+        return Member.objects.filter(id=member_id).exists()
+    except (TypeError, ValueError):
+        return False
+
+
+def checkout(book_id, member_id):
+    """Loan a copy of a book to a member.
+
+    The copy is taken with a conditional ``UPDATE`` so concurrent checkouts can
+    never push ``available_copies`` below zero; the ``Loan`` insert and its
+    ``loan.created`` outbox event share its transaction. Shelved copies of a
+    book with waiting holds belong to the queue, not to walk-up checkouts.
+    """
+    if not member_exists(member_id):
+        raise MemberNotFound()
+
+    with transaction.atomic():
+        taken = (
+            Book.objects.filter(id=book_id, available_copies__gt=0)
+            .exclude(Exists(waiting_holds(OuterRef("id"))))
+            .update(available_copies=F("available_copies") - 1)
+        )
+        if not taken:
+            raise NoCopiesAvailable()
+        loan = Loan.objects.create(book_id=book_id, member_id=member_id)
+        outbox.record(outbox.LOAN_CREATED, [{"loan_id": loan.id}])
+        availability.refresh([book_id])
+        return loan
+
+
+def active_loans(book_id, member_id):
+    """The member's open loans of a book, oldest first (see ``loan_active_idx``)."""
+    return Loan.objects.filter(
+        book_id=book_id, member_id=member_id, is_returned=False
+    ).order_by("id")
+
+
+def return_book(book_id, member_id):
+    """Close the member's oldest active loan of a book.
+
+    The copy goes to the first waiting hold, or back on the shelf.
+    """
+    with transaction.atomic():
+        try:
+            loan = active_loans(book_id, member_id).first()
+        except (TypeError, ValueError):
+            loan = None
+        if loan is None:
+            raise ActiveLoanNotFound()
+
+        loan.is_returned = True
+        loan.return_date = timezone.now().date()
+        # A concurrent return of the same loan loses here and restores nothing.
+        closed = Loan.objects.filter(id=loan.id, is_returned=False).update(
+            is_returned=True, return_date=loan.return_date
+        )
+        if not closed:
+            raise ActiveLoanNotFound()
+
+        Member.adjust_active_loans({loan.member_id: -1})
+        loan._counted_member_id = None
+        # The copy goes to the head of the waitlist, if anyone is waiting.
+        if allocate(next_hold(book_id)) is None:
+            Book.objects.filter(id=book_id).update(
+                available_copies=F("available_copies") + 1
+            )
+            cache.invalidate("books")
+            availability.refresh([book_id])
+        return loan
+
+
+def waiting_holds(book_id):
+    """Holds on a book still waiting for a copy (see ``hold_waiting_idx``)."""
+    return Hold.objects.filter(book_id=book_id, allocated_at__isnull=True)
+
+
+def next_hold(book_id):
+    """Lock the oldest waiting hold on a book that no one else has locked.
+
+    SKIP LOCKED lets concurrent returns of the same title each take a
+    different hold instead of queueing behind the first one.
+    """
+    return (
+        waiting_holds(book_id)
+        .select_for_update(skip_locked=True, of=("self",))
+        .order_by("id")
+        .first()
+    )
+
+
+def allocate(hold):
+    """Loan a copy already taken off the shelf to a locked ``hold``."""
+    if hold is None:
+        return None
+    hold.loan = Loan.objects.create(book_id=hold.book_id, member_id=hold.member_id)
+    hold.allocated_at = timezone.now()
+    hold.save(update_fields=["loan", "allocated_at"])
+    outbox.record(outbox.HOLD_READY, [{"hold_id": hold.id}])
+    return hold
+
+
+def place_hold(book_id, member_id):
+    """Queue a member for a book that has no copies left.
+
+    Returns the hold and its position in the queue.
+    """
+    if not member_exists(member_id):
+        raise MemberNotFound()
+
+    if Book.objects.filter(id=book_id, available_copies__gt=0).exists():
+        raise CopiesAvailable()
+    try:
+        with transaction.atomic():
+            hold = Hold.objects.create(book_id=book_id, member_id=member_id)
+    except IntegrityError:
+        raise AlreadyOnHold()
+
+    # A copy returned while the hold was being placed went to the shelf;
+    # hand it to the queue now.
+    allocate_available(book_id)
+    position = Hold.objects.filter(
+        book_id=book_id, allocated_at__isnull=True, id__lte=hold.id
+    ).count()
+    return hold, position
+
+
+def allocate_available(book_id):
+    """Allocate shelved copies of a book to waiting holds, one at a time."""
+    allocated = 0
+    while True:
+        with transaction.atomic():
+            hold = next_hold(book_id)
+            if hold is None:
+                break
+            taken = Book.objects.filter(id=book_id, available_copies__gt=0).update(
+                available_copies=F("available_copies") - 1
+            )
+            if not taken:
+                break
+            allocate(hold)
+            cache.invalidate("books")
+            availability.refresh([book_id])
+        allocated += 1
+    return allocated
+
+
+def allocate_waiting(books):
+    """Run ``allocate_available`` for the ``books`` with copies and a waitlist.
+
+    Called after writes that may put copies back on the shelf outside of
+    ``return_book``, so the queue is served before any walk-up checkout.
+    """
+    book_ids = (
+        Hold.objects.filter(
+            book__in=books.filter(available_copies__gt=0), allocated_at__isnull=True
+        )
+        .order_by("book_id")
+        .values_list("book_id", flat=True)
+        .distinct()
+    )
+    return sum(allocate_available(book_id) for book_id in book_ids)
+
+
+def _as_id(value):
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def bulk_checkout(items):
+    """Loan many ``(book_id, member_id)`` pairs in one transaction.
+
+    Availability and membership are checked with set-based queries, loans are
+    inserted with a single ``bulk_create`` and copies are decremented in one
+    ``UPDATE``. Returns one result dict per item, in request order; items that
+    cannot be loaned carry an ``error`` and do not affect the others.
+    """
+    results = []
+    for index, item in enumerate(items):
+        book_id = member_id = None
+        if isinstance(item, dict):
+            book_id = _as_id(item.get("book_id"))
+            member_id = _as_id(item.get("member_id"))
+        results.append({"index": index, "book_id": book_id, "member_id": member_id})
+        if book_id is None or member_id is None:
+            results[-1]["error"] = "book_id and member_id are required."
+
+    pending = [result for result in results if "error" not in result]
+    with transaction.atomic():
+        copies = dict(
+            Book.objects.select_for_update()
+            .filter(id__in={result["book_id"] for result in pending})
+            .order_by("id")
+            .values_list("id", "available_copies")
+        )
+        # Copies of books with waiting holds are kept for the queue.
+        for book_id in (
+            Hold.objects.filter(book_id__in=copies, allocated_at__isnull=True)
+            .values_list("book_id", flat=True)
+            .distinct()
+        ):
+            copies[book_id] = 0
+        # Locked until commit, so no member is deleted under its new loans.
+        members = set(
+            Member.objects.select_for_update(no_key=True)
+            .filter(id__in={result["member_id"] for result in pending})
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        taken = {}
+        for result in pending:
+            book_id = result["book_id"]
+            if result["member_id"] not in members:
+                result["error"] = str(MemberNotFound())
+            elif copies.get(book_id, 0) - taken.get(book_id, 0) < 1:
+                result["error"] = str(NoCopiesAvailable())
+            else:
+                taken[book_id] = taken.get(book_id, 0) + 1
+
+        accepted = [result for result in pending if "error" not in result]
+        loans = Loan.objects.bulk_create(
+            [
+                Loan(book_id=result["book_id"], member_id=result["member_id"])
+                for result in accepted
+            ]
+        )
+        loaned = {}
+        for loan in loans:
+            loaned[loan.member_id] = loaned.get(loan.member_id, 0) + 1
+        Member.adjust_active_loans(loaned)
+        outbox.record(outbox.LOAN_CREATED, [{"loan_id": loan.id} for loan in loans])
+        if taken:
+            cache.invalidate("books")
+            availability.refresh(taken)
+            Book.objects.filter(id__in=taken).update(
+                available_copies=F("available_copies")
+                - Case(
+                    *[When(id=book_id, then=count) for book_id, count in taken.items()],
+                    output_field=PositiveIntegerField(),
+                )
+            )
+
+    for result, loan in zip(accepted, loans):
+        result["loan_id"] = loan.id
+    return results
@@ -0,0 +1,74 @@
+import csv
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+BOOK_EXPORT_FIELDS = [
+    "id",
+    "title",
+    "isbn",
+    "genre",
+    "available_copies",
+    "author_id",
+    "author__first_name",
+    "author__last_name",
+]
+
+LOAN_EXPORT_FIELDS = [
+    "id",
+    "book_id",
+    "book__title",
+    "book__isbn",
+    "member_id",
+    "member__user__username",
+    "member__user__email",
+    "loan_date",
+    "due_date",
+    "return_date",
+    "is_returned",
+]
+
+CONTENT_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(rows):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(row) + "\n"
+
+
+def csv_lines(rows, fields):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row[field] for field in fields)
+
+
+def stream_export(queryset, fields, output, filename):
+    """Stream ``queryset`` as NDJSON or CSV from a server-side cursor.
+
+    Rows are read as ``values()`` dicts in ``EXPORT_CHUNK_SIZE`` batches and
+    written as they arrive, so memory stays flat whatever the export size.
+    """
+    rows = (
+        queryset.order_by("id")
+        .values(*fields)
+        .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    )
+    lines = csv_lines(rows, fields) if output == "csv" else ndjson_lines(rows)
+    response = StreamingHttpResponse(lines, content_type=CONTENT_TYPES[output])
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{output}"'
+    return response
+
+
+def export_output(request):
+    output = request.query_params.get("output", "ndjson")
+    if output not in CONTENT_TYPES:
+        raise ValueError(f"output must be one of {', '.join(CONTENT_TYPES)}")
+    return output
@@ -0,0 +1,91 @@
+"""Build list payloads straight from ``values()`` rows.
+
+``row_plan(serializer_class)`` walks a read serializer once and returns the
+``values()`` paths it needs (nested serializers become joined columns) and a
+function turning one row into the dict the serializer would have produced.
+Serializers using anything the plan cannot reproduce exactly get ``None``
+and keep the regular path.
+"""
+
+from functools import lru_cache
+
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+# Field classes whose representation of a database value is the value itself.
+PASSTHROUGH_FIELDS = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.EmailField,
+    serializers.BooleanField,
+)
+
+
+class Unsupported(Exception):
+    pass
+
+
+def iso_date(value):
+    return value.isoformat()
+
+
+def column(field):
+    """Return the converter for a plain field, or None if none is needed."""
+    field_class = type(field)
+    if field_class is serializers.DateField:
+        output_format = getattr(field, "format", api_settings.DATE_FORMAT)
+        if output_format is None or output_format.lower() != ISO_8601:
+            raise Unsupported(field)
+        return iso_date
+    if field_class in PASSTHROUGH_FIELDS:
+        return None
+    if field_class is serializers.ChoiceField and all(
+        isinstance(key, str) for key in field.choices
+    ):
+        return None
+    raise Unsupported(field)
+
+
+def compile_serializer(serializer, prefix, paths):
+    steps = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if "." in field.source or field.source == "*":
+            raise Unsupported(field)
+        path = prefix + field.source
+        if isinstance(field, serializers.BaseSerializer):
+            if isinstance(field, serializers.ListSerializer):
+                raise Unsupported(field)
+            relation = serializer.Meta.model._meta.get_field(field.source)
+            if relation.null or relation.many_to_many or relation.one_to_many:
+                raise Unsupported(field)
+            steps.append((name, None, compile_serializer(field, path + "__", paths)))
+        else:
+            paths.append(path)
+            steps.append((name, path, column(field)))
+
+    def build(row):
+        data = {}
+        for name, path, convert in steps:
+            if path is None:
+                data[name] = convert(row)
+            else:
+                value = row[path]
+                data[name] = (
+                    value if convert is None or value is None else convert(value)
+                )
+        return data
+
+    return build
+
+
+@lru_cache(maxsize=None)
+def row_plan(serializer_class):
+    """Return ``(paths, build)`` for ``serializer_class``, or None."""
+    paths = []
+    try:
+        build = compile_serializer(serializer_class(), "", paths)
+    except Unsupported:
+        return None
+    return tuple(paths), build
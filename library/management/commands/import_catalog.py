@@ -0,0 +1,252 @@
+import csv
+import io
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Exists, F, OuterRef, Subquery
+from django.db.models.functions import Greatest
+
+from library import availability, cache, circulation
+from library.models import Author, Book, Loan
+
+GENRES = {value for value, _ in Book.GENRE_CHOICES}
+ISBN_LENGTH = Book._meta.get_field("isbn").max_length
+TITLE_LENGTH = Book._meta.get_field("title").max_length
+
+COPY_TABLE = "library_book_import"
+COPY_COLUMNS = ["title", "author_id", "isbn", "genre", "available_copies"]
+
+
+class CatalogReader:
+    """Yield catalog rows from a CSV or NDJSON file, tracking the byte offset.
+
+    ``offset`` always points just past the last row handed out, so a
+    checkpoint taken after a batch can resume exactly where it stopped.
+    """
+
+    def __init__(self, path, file_format, offset=0):
+        self.path = path
+        self.format = file_format
+        self.offset = offset
+
+    def lines(self, handle):
+        for line in handle:
+            first = self.offset == 0
+            self.offset += len(line)
+            yield line.decode("utf-8-sig" if first else "utf-8")
+
+    def __iter__(self):
+        with open(self.path, "rb") as handle:
+            resume_at, self.offset = self.offset, 0
+            if self.format == "csv":
+                header = next(csv.reader(self.lines(handle)), [])
+            if resume_at > self.offset:
+                handle.seek(resume_at)
+                self.offset = resume_at
+
+            if self.format == "csv":
+                for values in csv.reader(self.lines(handle)):
+                    if values:
+                        yield dict(zip(header, values))
+            else:
+                for line in self.lines(handle):
+                    if line.strip():
+                        yield json.loads(line)
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV or NDJSON catalog into Book/Author, upserting on isbn."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "ndjson"])
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--checkpoint",
+            help="Progress file used to resume after a crash "
+            "(default: <path>.checkpoint).",
+        )
+        parser.add_argument(
+            "--restart", action="store_true", help="Ignore an existing checkpoint."
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.exists(path):
+            raise CommandError(f"{path} does not exist")
+        file_format = options["format"] or (
+            "csv" if path.lower().endswith(".csv") else "ndjson"
+        )
+        checkpoint_path = options["checkpoint"] or f"{path}.checkpoint"
+        checkpoint = self.load_checkpoint(checkpoint_path, path, options["restart"])
+        if checkpoint["offset"]:
+            self.stdout.write(
+                f"Resuming {path} after {checkpoint['imported']} rows "
+                f"(byte {checkpoint['offset']})"
+            )
+
+        self.authors = {}
+        for author_id, first_name, last_name in (
+            Author.objects.order_by("-id")
+            .values_list("id", "first_name", "last_name")
+            .iterator()
+        ):
+            self.authors[(first_name, last_name)] = author_id
+
+        reader = CatalogReader(path, file_format, checkpoint["offset"])
+        resumed = checkpoint["imported"]
+        started = time.monotonic()
+        imported = skipped = 0
+        batch = []
+        for row in reader:
+            book = self.clean(row)
+            if book is None:
+                skipped += 1
+            else:
+                batch.append(book)
+            if len(batch) >= options["batch_size"]:
+                imported += self.flush(batch)
+                checkpoint.update(offset=reader.offset, imported=resumed + imported)
+                self.save_checkpoint(checkpoint_path, checkpoint)
+                self.progress(imported, started)
+                batch = []
+        imported += self.flush(batch)
+
+        if imported:
+            cache.invalidate("authors", "books")
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {imported} books ({skipped} skipped) in {elapsed:.1f}s, "
+                f"{imported / elapsed if elapsed else 0:.0f} rows/s"
+            )
+        )
+
+    def clean(self, row):
+        isbn = str(row.get("isbn") or "").strip()
+        title = str(row.get("title") or "").strip()
+        genre = str(row.get("genre") or "").strip()
+        first_name = str(row.get("author_first_name") or "").strip()
+        last_name = str(row.get("author_last_name") or "").strip()
+        try:
+            copies = int(row.get("available_copies") or 1)
+        except (TypeError, ValueError):
+            return None
+        if (
+            not isbn
+            or len(isbn) > ISBN_LENGTH
+            or not title
+            or len(title) > TITLE_LENGTH
+            or genre not in GENRES
+            or not (first_name or last_name)
+            or copies < 0
+        ):
+            return None
+        return {
+            "title": title,
+            "isbn": isbn,
+            "genre": genre,
+            "available_copies": copies,
+            "author": (first_name, last_name),
+        }
+
+    def flush(self, batch):
+        # Last row wins when a file repeats an isbn inside one batch.
+        books = list({book["isbn"]: book for book in batch}.values())
+        if not books:
+            return 0
+
+        with transaction.atomic():
+            missing = {book["author"] for book in books} - self.authors.keys()
+            created = Author.objects.bulk_create(
+                Author(first_name=first_name, last_name=last_name)
+                for first_name, last_name in missing
+            )
+            for author in created:
+                self.authors[(author.first_name, author.last_name)] = author.id
+            for book in books:
+                book["author_id"] = self.authors[book.pop("author")]
+
+            if connection.vendor == "postgresql":
+                self.copy_upsert(books)
+            else:
+                Book.objects.bulk_create(
+                    [Book(**book) for book in books],
+                    update_conflicts=True,
+                    unique_fields=["isbn"],
+                    update_fields=["title", "author", "genre", "available_copies"],
+                )
+            self.subtract_loans([book["isbn"] for book in books])
+            availability.refresh(isbns=[book["isbn"] for book in books])
+        circulation.allocate_waiting(
+            Book.objects.filter(isbn__in=[book["isbn"] for book in books])
+        )
+        return len(books)
+
+    def subtract_loans(self, isbns):
+        # The catalog counts every copy; copies out on loan are not available.
+        on_loan = (
+            Loan.objects.filter(book=OuterRef("pk"), is_returned=False)
+            .order_by()
+            .values("book")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        Book.objects.filter(Exists(on_loan.values("book")), isbn__in=isbns).update(
+            available_copies=Greatest(F("available_copies") - Subquery(on_loan), 0)
+        )
+
+    def copy_upsert(self, books):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for book in books:
+            writer.writerow(book[column] for column in COPY_COLUMNS)
+        buffer.seek(0)
+
+        columns = ", ".join(COPY_COLUMNS)
+        updates = ", ".join(
+            f"{column} = EXCLUDED.{column}"
+            for column in COPY_COLUMNS
+            if column != "isbn"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {COPY_TABLE} ON COMMIT DELETE ROWS "
+                f"AS SELECT {columns} FROM library_book WITH NO DATA"
+            )
+            cursor.cursor.copy_expert(
+                f"COPY {COPY_TABLE} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+            cursor.execute(
+                f"INSERT INTO library_book ({columns}) "
+                f"SELECT {columns} FROM {COPY_TABLE} "
+                f"ON CONFLICT (isbn) DO UPDATE SET {updates}"
+            )
+
+    def load_checkpoint(self, checkpoint_path, path, restart):
+        fresh = {"path": os.path.abspath(path), "offset": 0, "imported": 0}
+        if restart or not os.path.exists(checkpoint_path):
+            return fresh
+        with open(checkpoint_path) as handle:
+            checkpoint = json.load(handle)
+        if checkpoint.get("path") != fresh["path"]:
+            raise CommandError(f"{checkpoint_path} belongs to another file")
+        return checkpoint
+
+    def save_checkpoint(self, checkpoint_path, checkpoint):
+        temporary = f"{checkpoint_path}.tmp"
+        with open(temporary, "w") as handle:
+            json.dump(checkpoint, handle)
+        os.replace(temporary, checkpoint_path)
+
+    def progress(self, imported, started):
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"  {imported} rows imported, {imported / elapsed if elapsed else 0:.0f} rows/s"
+        )
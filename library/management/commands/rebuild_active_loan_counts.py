@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from library.models import Loan, Member
+
+
+def active_loan_count():
+    return Coalesce(
+        Subquery(
+            Loan.objects.filter(member=OuterRef("pk"), is_returned=False)
+            .order_by()
+            .values("member")
+            .annotate(total=Count("id"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = "Recompute every member's active loan counter from the loans table."
+
+    def handle(self, *args, **options):
+        updated = Member.objects.update(active_loans=active_loan_count())
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt active loan counts for {updated} members")
+        )
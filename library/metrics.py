@@ -0,0 +1,166 @@
+"""In-process request metrics, exposed in the Prometheus text format.
+
+Every worker process keeps its own registry; scrape each process (or each
+container running a single worker) separately.
+"""
+
+import threading
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.http import HttpResponse
+
+from . import cache
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets, labels):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.labels = labels
+        self.series = defaultdict(lambda: [[0] * len(self.buckets), 0, 0])
+        self.lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self.lock:
+            counts, _, _ = series = self.series[label_values]
+            index = bisect_left(self.buckets, value)
+            if index < len(counts):
+                counts[index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self.lock:
+            snapshot = {
+                labels: (list(counts), total, count)
+                for labels, (counts, total, count) in self.series.items()
+            }
+        for label_values, (counts, total, count) in sorted(snapshot.items()):
+            labels = format_labels(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = format_labels(
+                    [*zip(self.labels, label_values), ("le", bound)]
+                )
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            bucket_labels = format_labels(
+                [*zip(self.labels, label_values), ("le", "+Inf")]
+            )
+            yield f"{self.name}_bucket{bucket_labels} {count}"
+            yield f"{self.name}_sum{labels} {total}"
+            yield f"{self.name}_count{labels} {count}"
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        yield from self.samples()
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(pairs):
+    rendered = ",".join(f'{name}="{escape(value)}"' for name, value in pairs)
+    return f"{{{rendered}}}" if rendered else ""
+
+
+def render_metric(name, metric_type, help_text, samples):
+    yield f"# HELP {name} {help_text}"
+    yield f"# TYPE {name} {metric_type}"
+    for labels, value in samples:
+        yield f"{name}{format_labels(labels)} {value}"
+
+
+REQUEST_LABELS = ("view", "method")
+
+request_duration = Histogram(
+    "library_request_duration_seconds",
+    "Total request latency.",
+    LATENCY_BUCKETS,
+    REQUEST_LABELS,
+)
+request_db_duration = Histogram(
+    "library_request_db_duration_seconds",
+    "Time spent executing SQL per request.",
+    LATENCY_BUCKETS,
+    REQUEST_LABELS,
+)
+request_serialize_duration = Histogram(
+    "library_request_serialize_duration_seconds",
+    "Time spent in serializers building the response data.",
+    LATENCY_BUCKETS,
+    REQUEST_LABELS,
+)
+request_render_duration = Histogram(
+    "library_request_render_duration_seconds",
+    "Time spent rendering the response data to bytes.",
+    LATENCY_BUCKETS,
+    REQUEST_LABELS,
+)
+request_queries = Histogram(
+    "library_request_queries",
+    "SQL queries executed per request.",
+    QUERY_BUCKETS,
+    REQUEST_LABELS,
+)
+HISTOGRAMS = (
+    request_duration,
+    request_db_duration,
+    request_serialize_duration,
+    request_render_duration,
+    request_queries,
+)
+
+
+def pool_lines():
+    try:
+        from library_system.pooled_postgresql.pool import pool_stats
+    except ImportError:  # psycopg2 is not installed
+        return
+    by_alias = defaultdict(Counter)
+    for (alias, _), stats in pool_stats().items():
+        by_alias[alias].update(stats)
+    for field, metric_type in (
+        ("created", "counter"),
+        ("checkouts", "counter"),
+        ("waits", "counter"),
+        ("timeouts", "counter"),
+        ("discarded", "counter"),
+        ("size", "gauge"),
+        ("idle", "gauge"),
+    ):
+        yield from render_metric(
+            f"library_db_pool_{field}" + ("_total" if metric_type == "counter" else ""),
+            metric_type,
+            f"Database connection pool {field}.",
+            [([("alias", alias)], stats[field]) for alias, stats in by_alias.items()],
+        )
+
+
+def render():
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    lines.extend(
+        render_metric(
+            "library_response_cache_total",
+            "counter",
+            "Response cache lookups by result.",
+            [([("result", result)], count) for result, count in cache.stats.items()],
+        )
+    )
+    lines.extend(pool_lines())
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
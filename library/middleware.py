@@ -0,0 +1,154 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# The profile of the request being handled. Context variables follow the
+# request into sync_to_async threads, so async views are profiled too.
+current_profile = ContextVar("library_request_profile", default=None)
+
+PLACEHOLDERS = re.compile(r"\((?:\s*%s\s*,)+\s*%s\s*\)")
+
+
+def query_shape(sql):
+    # IN lists of different lengths are the same query.
+    return PLACEHOLDERS.sub("(%s, ...)", sql)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper installed on every connection (see signals)."""
+    profile = current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.db_time += time.perf_counter() - started
+        profile.shapes[query_shape(sql)] += 1
+
+
+@contextmanager
+def serializing():
+    """Count the block as serializer time of the request being profiled.
+
+    Nested serializers run inside their parent's block and are counted once.
+    """
+    profile = current_profile.get()
+    if profile is None or profile.serializing:
+        yield
+        return
+    profile.serializing = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.serializing = False
+        profile.serialize_time += time.perf_counter() - started
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.serializing = False
+        self.render_time = 0.0
+        self.render_started = None
+        self.shapes = Counter()
+
+    @property
+    def queries(self):
+        return sum(self.shapes.values())
+
+    def start_render(self):
+        self.render_started = time.perf_counter()
+
+    def end_render(self):
+        if self.render_started is not None:
+            self.render_time = time.perf_counter() - self.render_started
+
+
+class PerformanceMiddleware:
+    """Profile each request: SQL count and time, serializer and render time
+    and latency.
+
+    Results go out in a ``Server-Timing`` header, into the per-view
+    histograms served by ``/metrics``, and repeated query shapes (likely
+    N+1s) are logged as warnings.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        return self.finish(request, response, profile)
+
+    def process_template_response(self, request, response):
+        # DRF responses serialize to JSON when rendered, after the view returns.
+        profile = current_profile.get()
+        if profile is not None:
+            profile.start_render()
+            response.add_post_render_callback(lambda _: profile.end_render())
+        return response
+
+    def finish(self, request, response, profile):
+        total = time.perf_counter() - profile.started
+        match = request.resolver_match
+        labels = (match.view_name if match else "unmatched", request.method)
+
+        metrics.request_duration.observe(total, *labels)
+        metrics.request_db_duration.observe(profile.db_time, *labels)
+        metrics.request_serialize_duration.observe(profile.serialize_time, *labels)
+        metrics.request_render_duration.observe(profile.render_time, *labels)
+        metrics.request_queries.observe(profile.queries, *labels)
+
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={profile.db_time * 1000:.2f};desc="{profile.queries} queries"',
+                f"serialize;dur={profile.serialize_time * 1000:.2f}",
+                f"render;dur={profile.render_time * 1000:.2f}",
+                f"total;dur={total * 1000:.2f}",
+            ]
+        )
+
+        threshold = settings.N_PLUS_ONE_THRESHOLD
+        for shape, count in profile.shapes.most_common():
+            if count < threshold:
+                break
+            logger.warning(
+                f"Possible N+1: {request.method} {request.path} ({labels[0]}) ran "
+                f"the same query {count} times: {shape[:300]}"
+            )
+        return response
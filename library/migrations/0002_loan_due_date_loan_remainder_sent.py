@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-18 19:56
+
+from django.db import migrations, models
+
+import library.helper
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="loan",
+            name="due_date",
+            field=models.DateField(default=library.helper.due_on),
+        ),
+        migrations.AddField(
+            model_name="loan",
+            name="remainder_sent",
+            field=models.BooleanField(default=False),
+        ),
+    ]
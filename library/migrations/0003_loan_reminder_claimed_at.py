@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 19:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0002_loan_due_date_loan_remainder_sent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="loan",
+            name="reminder_claimed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
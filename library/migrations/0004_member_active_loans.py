@@ -0,0 +1,44 @@
+# Generated by Django 4.2 on 2026-10-18 20:03
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_active_loans(apps, schema_editor):
+    Loan = apps.get_model("library", "Loan")
+    Member = apps.get_model("library", "Member")
+    Member.objects.update(
+        active_loans=Coalesce(
+            Subquery(
+                Loan.objects.filter(member=OuterRef("pk"), is_returned=False)
+                .order_by()
+                .values("member")
+                .annotate(total=Count("id"))
+                .values("total")
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0003_loan_reminder_claimed_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="member",
+            name="active_loans",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="member",
+            index=models.Index(
+                fields=["-active_loans", "id"], name="member_active_loans_idx"
+            ),
+        ),
+        migrations.RunPython(count_active_loans, migrations.RunPython.noop),
+    ]
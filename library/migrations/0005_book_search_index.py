@@ -0,0 +1,120 @@
+from django.db import migrations
+
+POSTGRES_FORWARD = """
+ALTER TABLE library_book ADD COLUMN search_vector tsvector;
+
+CREATE FUNCTION library_book_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.isbn, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(
+            (SELECT first_name || ' ' || last_name
+             FROM library_author WHERE id = NEW.author_id), '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER library_book_search_vector
+    BEFORE INSERT OR UPDATE OF title, isbn, author_id ON library_book
+    FOR EACH ROW EXECUTE FUNCTION library_book_search_vector();
+
+CREATE FUNCTION library_author_search_vector() RETURNS trigger AS $$
+BEGIN
+    UPDATE library_book SET title = title WHERE author_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER library_author_search_vector
+    AFTER UPDATE OF first_name, last_name ON library_author
+    FOR EACH ROW EXECUTE FUNCTION library_author_search_vector();
+
+UPDATE library_book SET title = title;
+
+CREATE INDEX library_book_search_vector_idx
+    ON library_book USING gin (search_vector);
+"""
+
+POSTGRES_REVERSE = """
+DROP TRIGGER library_author_search_vector ON library_author;
+DROP FUNCTION library_author_search_vector();
+DROP TRIGGER library_book_search_vector ON library_book;
+DROP FUNCTION library_book_search_vector();
+ALTER TABLE library_book DROP COLUMN search_vector;
+"""
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE library_book_fts USING fts5(
+        title, isbn, author_name, tokenize = 'porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER library_book_fts_insert AFTER INSERT ON library_book BEGIN
+        INSERT INTO library_book_fts (rowid, title, isbn, author_name)
+        SELECT NEW.id, NEW.title, NEW.isbn, first_name || ' ' || last_name
+        FROM library_author WHERE id = NEW.author_id;
+    END
+    """,
+    """
+    CREATE TRIGGER library_book_fts_update
+    AFTER UPDATE OF title, isbn, author_id ON library_book BEGIN
+        DELETE FROM library_book_fts WHERE rowid = OLD.id;
+        INSERT INTO library_book_fts (rowid, title, isbn, author_name)
+        SELECT NEW.id, NEW.title, NEW.isbn, first_name || ' ' || last_name
+        FROM library_author WHERE id = NEW.author_id;
+    END
+    """,
+    """
+    CREATE TRIGGER library_book_fts_delete AFTER DELETE ON library_book BEGIN
+        DELETE FROM library_book_fts WHERE rowid = OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER library_author_fts_update
+    AFTER UPDATE OF first_name, last_name ON library_author BEGIN
+        UPDATE library_book_fts
+        SET author_name = NEW.first_name || ' ' || NEW.last_name
+        WHERE rowid IN (SELECT id FROM library_book WHERE author_id = NEW.id);
+    END
+    """,
+    """
+    INSERT INTO library_book_fts (rowid, title, isbn, author_name)
+    SELECT b.id, b.title, b.isbn, a.first_name || ' ' || a.last_name
+    FROM library_book b JOIN library_author a ON a.id = b.author_id
+    """,
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER library_author_fts_update",
+    "DROP TRIGGER library_book_fts_delete",
+    "DROP TRIGGER library_book_fts_update",
+    "DROP TRIGGER library_book_fts_insert",
+    "DROP TABLE library_book_fts",
+]
+
+
+def run(statements):
+    def apply(apps, schema_editor):
+        vendor_statements = statements.get(schema_editor.connection.vendor, [])
+        if isinstance(vendor_statements, str):
+            vendor_statements = [vendor_statements]
+        for statement in vendor_statements:
+            schema_editor.execute(statement)
+
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0004_member_active_loans"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD}),
+            run({"postgresql": POSTGRES_REVERSE, "sqlite": SQLITE_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2 on 2026-10-18 20:17
+
+from django.db import migrations, models
+
+
+def move_queued_notifications(apps, schema_editor):
+    LoanNotification = apps.get_model("library", "LoanNotification")
+    OutboxEvent = apps.get_model("library", "OutboxEvent")
+    OutboxEvent.objects.bulk_create(
+        OutboxEvent(topic="loan.created", payload={"loan_id": loan_id})
+        for loan_id in LoanNotification.objects.order_by("id").values_list(
+            "loan_id", flat=True
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0006_loannotification"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("topic", models.CharField(max_length=100)),
+                ("payload", models.JSONField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(move_queued_notifications, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name="LoanNotification",
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2 on 2026-10-18 20:23
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class AddIndex(AddIndexConcurrently):
+    """Build the index without blocking writes on Postgres, plainly elsewhere."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_forwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_backwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("library", "0007_outboxevent"),
+    ]
+
+    operations = [
+        AddIndex(
+            model_name="author",
+            index=models.Index(fields=["last_name"], name="author_last_name_idx"),
+        ),
+        AddIndex(
+            model_name="book",
+            index=models.Index(fields=["genre", "id"], name="book_genre_idx"),
+        ),
+        AddIndex(
+            model_name="loan",
+            index=models.Index(
+                condition=models.Q(("is_returned", False)),
+                fields=["book", "member", "id"],
+                name="loan_active_idx",
+            ),
+        ),
+        AddIndex(
+            model_name="loan",
+            index=models.Index(
+                condition=models.Q(("is_returned", False), ("remainder_sent", False)),
+                fields=["id", "due_date"],
+                name="loan_overdue_reminder_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2 on 2026-10-18 20:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+LOAN_HISTORY_VIEW = """
+CREATE VIEW library_loanhistory AS
+SELECT id, book_id, member_id, loan_date, due_date, return_date, is_returned,
+       FALSE AS archived
+FROM library_loan
+UNION ALL
+SELECT id, book_id, member_id, loan_date, due_date, return_date,
+       TRUE AS is_returned, TRUE AS archived
+FROM library_loanarchive
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0009_hold"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LoanHistory",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("loan_date", models.DateField()),
+                ("due_date", models.DateField()),
+                ("return_date", models.DateField(blank=True, null=True)),
+                ("is_returned", models.BooleanField()),
+                ("archived", models.BooleanField()),
+            ],
+            options={
+                "db_table": "library_loanhistory",
+                "managed": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="LoanArchive",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("loan_date", models.DateField()),
+                ("due_date", models.DateField()),
+                ("return_date", models.DateField(blank=True, null=True)),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "book",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_loans",
+                        to="library.book",
+                    ),
+                ),
+                (
+                    "member",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_loans",
+                        to="library.member",
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunSQL(LOAN_HISTORY_VIEW, "DROP VIEW IF EXISTS library_loanhistory"),
+    ]
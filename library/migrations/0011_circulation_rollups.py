@@ -0,0 +1,77 @@
+# Generated by Django 4.2 on 2026-10-18 20:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0010_loan_archive"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CirculationRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                (
+                    "genre",
+                    models.CharField(
+                        choices=[
+                            ("fiction", "Fiction"),
+                            ("nonfiction", "Non-Fiction"),
+                            ("sci-fi", "Sci-Fi"),
+                            ("biography", "Biography"),
+                        ],
+                        max_length=50,
+                    ),
+                ),
+                ("cohort", models.DateField()),
+                ("checkouts", models.PositiveIntegerField(default=0)),
+                ("returns", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="RollupWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("loan_id", models.BigIntegerField(default=0)),
+                ("day", models.DateField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="circulationrollup",
+            name="author",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="circulation_rollups",
+                to="library.author",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="circulationrollup",
+            constraint=models.UniqueConstraint(
+                fields=("day", "genre", "author", "cohort"),
+                name="circulation_rollup_bucket",
+            ),
+        ),
+    ]
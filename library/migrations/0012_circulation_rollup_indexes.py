@@ -0,0 +1,31 @@
+# Generated by Django 4.2 on 2026-10-18 20:38
+
+from django.db import migrations, models
+
+from library.migration_operations import AddIndex
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("library", "0011_circulation_rollups"),
+    ]
+
+    operations = [
+        AddIndex(
+            model_name="loan",
+            index=models.Index(
+                condition=models.Q(("is_returned", True)),
+                fields=["return_date"],
+                name="loan_returned_idx",
+            ),
+        ),
+        AddIndex(
+            model_name="loanarchive",
+            index=models.Index(
+                fields=["return_date"], name="loan_archive_returned_idx"
+            ),
+        ),
+    ]
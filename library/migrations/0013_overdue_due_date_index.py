@@ -0,0 +1,31 @@
+# Generated by Django 4.2 on 2026-10-18 20:44
+
+from django.db import migrations, models
+
+from library.migration_operations import AddIndex, RemoveIndex
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("library", "0012_circulation_rollup_indexes"),
+    ]
+
+    operations = [
+        # Build the replacement before dropping the old index, so reminders
+        # are never left without one.
+        AddIndex(
+            model_name="loan",
+            index=models.Index(
+                condition=models.Q(("is_returned", False), ("remainder_sent", False)),
+                fields=["due_date", "id"],
+                name="loan_overdue_due_idx",
+            ),
+        ),
+        RemoveIndex(
+            model_name="loan",
+            name="loan_overdue_reminder_idx",
+        ),
+    ]
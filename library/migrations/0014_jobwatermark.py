@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 21:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0013_overdue_due_date_index"),
+    ]
+
+    operations = [
+        migrations.RenameModel(
+            old_name="RollupWatermark",
+            new_name="JobWatermark",
+        ),
+    ]
@@ -0,0 +1,216 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db import IntegrityError
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from . import batch
+from . import cache as response_cache
+from .fast_serializers import row_plan
+from .middleware import serializing
+
+
+def _related_field(model, source):
+    try:
+        field = model._meta.get_field(source)
+    except FieldDoesNotExist:
+        return None
+    return field if field.is_relation else None
+
+
+def _plan(serializer, model, prefix, select, prefetch, in_prefetch):
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*" or "." in field.source:
+            continue
+
+        if isinstance(field, serializers.ListSerializer):
+            child, many = field.child, True
+        elif isinstance(field, serializers.ManyRelatedField):
+            child, many = field.child_relation, True
+        else:
+            child, many = field, False
+
+        if not isinstance(
+            child, (serializers.BaseSerializer, serializers.RelatedField)
+        ):
+            continue
+        if (
+            not many
+            and isinstance(child, serializers.RelatedField)
+            and child.use_pk_only_optimization()
+        ):
+            continue
+
+        relation = _related_field(model, field.source)
+        if relation is None:
+            continue
+
+        path = f"{prefix}{field.source}"
+        to_many = relation.many_to_many or relation.one_to_many
+        if to_many or in_prefetch:
+            prefetch.append(path)
+        else:
+            select.append(path)
+
+        if isinstance(child, serializers.ModelSerializer):
+            _plan(
+                child,
+                relation.related_model,
+                f"{path}__",
+                select,
+                prefetch,
+                in_prefetch or to_many,
+            )
+
+
+@lru_cache(maxsize=None)
+def eager_loading_plan(serializer_class):
+    """Return the ``(select_related, prefetch_related)`` paths a serializer needs.
+
+    Nested serializers and non-pk related fields reached through forward or
+    one-to-one relations are joined; anything below a to-many relation is
+    prefetched.
+    """
+    select, prefetch = [], []
+    serializer = serializer_class()
+    _plan(serializer, serializer.Meta.model, "", select, prefetch, False)
+    return tuple(select), tuple(prefetch)
+
+
+class EagerLoadingMixin:
+    """Apply the serializer's eager-loading plan to the viewset queryset."""
+
+    def get_queryset(self):
+        return self.eager_load(super().get_queryset())
+
+    def eager_load(self, queryset):
+        select, prefetch = eager_loading_plan(self.get_serializer_class())
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
+class FastListMixin:
+    """Serve ``list`` from ``values()`` rows when FAST_LIST_SERIALIZATION is on.
+
+    The payload matches the serializer's; serializers ``row_plan`` cannot
+    reproduce keep the regular path.
+    """
+
+    def list(self, request, *args, **kwargs):
+        plan = row_plan(self.get_serializer_class())
+        if not settings.FAST_LIST_SERIALIZATION or plan is None:
+            return super().list(request, *args, **kwargs)
+
+        paths, build = plan
+        queryset = self.filter_queryset(self.get_queryset()).values(*paths)
+        page = self.paginate_queryset(queryset)
+        values = list(queryset if page is None else page)
+        with serializing():
+            rows = [build(row) for row in values]
+        if page is None:
+            return Response(rows)
+        return self.get_paginated_response(rows)
+
+
+class CachedResponseMixin:
+    """Serve ``list``/``retrieve`` from the response cache with ETags.
+
+    Entries are keyed by the current versions of ``cache_namespaces``, so any
+    write that bumps one of them retires every cached page at once.
+    """
+
+    cache_namespaces = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = response_cache.response_key(
+            self.cache_namespaces, request.get_full_path()
+        )
+        entry = cache.get(key)
+        if entry is None:
+            response_cache.stats["misses"] += 1
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            entry = {
+                "data": response.data,
+                "etag": response_cache.etag_for(response.data),
+            }
+            cache.set(key, entry, settings.RESPONSE_CACHE_TIMEOUT)
+            response["X-Cache"] = "MISS"
+        else:
+            response_cache.stats["hits"] += 1
+            response = Response(entry["data"])
+            response["X-Cache"] = "HIT"
+
+        if response_cache.etag_matches(
+            request.headers.get("If-None-Match"), entry["etag"]
+        ):
+            response_cache.stats["not_modified"] += 1
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response["ETag"] = entry["etag"]
+        return response
+
+
+class BatchMixin:
+    """``POST``/``PATCH`` a list of rows to ``batch/`` to write them together.
+
+    ``POST`` creates every row; ``PATCH`` updates the rows named by their
+    ``id`` with the fields given. Each row gets a result with its ``id`` or
+    its validation ``errors``, as the single-row endpoints would report them.
+    """
+
+    @action(detail=False, methods=["post", "patch"])
+    def batch(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"error": "Expected a non-empty list of rows."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > settings.BATCH_MAX_ROWS:
+            return Response(
+                {"error": f"At most {settings.BATCH_MAX_ROWS} rows per batch."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        partial = request.method == "PATCH"
+        try:
+            results, objects = batch.write(
+                self.get_serializer_class(), items, partial=partial
+            )
+        except IntegrityError:
+            return Response(
+                {"error": "The batch conflicts with a concurrent write; retry it."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        if objects:
+            self.batch_written(objects)
+
+        written = len(objects)
+        if written == len(results):
+            response_status = status.HTTP_200_OK if partial else status.HTTP_201_CREATED
+        elif written:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(
+            {"written": written, "failed": len(results) - written, "results": results},
+            status=response_status,
+        )
+
+    def batch_written(self, objects):
+        """Bulk writes skip model signals; redo their side effects here."""
+        response_cache.invalidate(*self.cache_namespaces)
@@ -1,5 +1,7 @@
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
 
 from library.helper import due_on
 
@@ -9,6 +11,9 @@ class Author(models.Model):
     last_name = models.CharField(max_length=100)
     biography = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["last_name"], name="author_last_name_idx")]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
@@ -28,6 +33,9 @@ class Book(models.Model):
     genre = models.CharField(max_length=50, choices=GENRE_CHOICES)
     available_copies = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        indexes = [models.Index(fields=["genre", "id"], name="book_genre_idx")]
+
     def __str__(self):
         return self.title
 
@@ -37,9 +45,42 @@ class Member(models.Model):
     membership_date = models.DateField(auto_now_add=True)
     # Add more fields if necessary
 
+    # Unreturned loans, maintained by Loan writes and the circulation engine.
+    active_loans = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-active_loans", "id"], name="member_active_loans_idx")
+        ]
+
     def __str__(self):
         return self.user.username
 
+    @classmethod
+    def adjust_active_loans(cls, deltas):
+        """Apply ``{member_id: delta}`` to the active loan counters in one UPDATE."""
+        deltas = {
+            member_id: delta
+            for member_id, delta in deltas.items()
+            if member_id is not None and delta
+        }
+        if not deltas:
+            return
+        cls.objects.filter(id__in=deltas).update(
+            active_loans=Greatest(
+                F("active_loans")
+                + Case(
+                    *[
+                        When(id=member_id, then=delta)
+                        for member_id, delta in deltas.items()
+                    ],
+                    default=0,
+                    output_field=models.IntegerField(),
+                ),
+                Value(0),
+            )
+        )
+
 
 class Loan(models.Model):
     book = models.ForeignKey(Book, related_name="loans", on_delete=models.CASCADE)
@@ -51,6 +92,194 @@ class Loan(models.Model):
     # added
     due_date = models.DateField(default=due_on)
     remainder_sent = models.BooleanField(default=False)
+    reminder_claimed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Active loans only: return_book looks up the oldest one for a
+            # (book, member) pair.
+            models.Index(
+                fields=["book", "member", "id"],
+                name="loan_active_idx",
+                condition=models.Q(is_returned=False),
+            ),
+            # Reminders still to send, read one window of due dates at a time.
+            models.Index(
+                fields=["due_date", "id"],
+                name="loan_overdue_due_idx",
+                condition=models.Q(is_returned=False, remainder_sent=False),
+            ),
+            # Returns of a day, read by the circulation rollups.
+            models.Index(
+                fields=["return_date"],
+                name="loan_returned_idx",
+                condition=models.Q(is_returned=True),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.book.title} loaned to {self.member.user.username}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        loan = super().from_db(db, field_names, values)
+        if "is_returned" in field_names and "member_id" in field_names:
+            loan._counted_member_id = loan.counted_member_id
+        return loan
+
+    @property
+    def counted_member_id(self):
+        """The member whose active loan counter includes this loan, if any."""
+        return None if self.is_returned else self.member_id
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            before = None
+        elif hasattr(self, "_counted_member_id"):
+            before = self._counted_member_id
+        else:
+            stored = Loan.objects.filter(pk=self.pk).values("is_returned", "member_id")
+            before = next(
+                (row["member_id"] for row in stored if not row["is_returned"]), None
+            )
+
+        after = self.counted_member_id
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if before != after:
+                Member.adjust_active_loans({before: -1, after: 1})
+        self._counted_member_id = after
+
+
+class LoanArchive(models.Model):
+    """A returned loan moved out of ``Loan`` by ``archive_returned_loans``.
+
+    Archived loans keep their original id, so ids stay unique across both
+    tables.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    book = models.ForeignKey(
+        Book, related_name="archived_loans", on_delete=models.CASCADE
+    )
+    member = models.ForeignKey(
+        Member, related_name="archived_loans", on_delete=models.CASCADE
+    )
+    loan_date = models.DateField()
+    due_date = models.DateField()
+    return_date = models.DateField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["return_date"], name="loan_archive_returned_idx")
+        ]
+
+    def __str__(self):
+        return f"{self.book.title} loaned to {self.member.user.username} (archived)"
+
+
+class LoanHistory(models.Model):
+    """Read-only ``UNION ALL`` view over ``Loan`` and ``LoanArchive``.
+
+    Archived rows are always returned, so filtering on ``is_returned=False``
+    lets Postgres prune the archive branch entirely.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    book = models.ForeignKey(Book, related_name="+", on_delete=models.DO_NOTHING)
+    member = models.ForeignKey(Member, related_name="+", on_delete=models.DO_NOTHING)
+    loan_date = models.DateField()
+    due_date = models.DateField()
+    return_date = models.DateField(null=True, blank=True)
+    is_returned = models.BooleanField()
+    archived = models.BooleanField()
+
+    class Meta:
+        managed = False
+        db_table = "library_loanhistory"
+
+    def __str__(self):
+        return f"{self.book.title} loaned to {self.member.user.username}"
+
+
+class CirculationRollup(models.Model):
+    """Checkouts and returns per day, genre, author and member cohort.
+
+    ``cohort`` is the first day of the month the member joined. Rows are
+    maintained incrementally by ``update_circulation_rollups``.
+    """
+
+    day = models.DateField()
+    genre = models.CharField(max_length=50, choices=Book.GENRE_CHOICES)
+    author = models.ForeignKey(
+        Author, related_name="circulation_rollups", on_delete=models.CASCADE
+    )
+    cohort = models.DateField()
+    checkouts = models.PositiveIntegerField(default=0)
+    returns = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "genre", "author", "cohort"],
+                name="circulation_rollup_bucket",
+            )
+        ]
+
+
+class JobWatermark(models.Model):
+    """Progress marker of a periodic job, one row per job ``name``.
+
+    Each job documents what its ``loan_id`` and ``day`` mean.
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+    loan_id = models.BigIntegerField(default=0)
+    day = models.DateField(null=True, blank=True)
+
+
+class Hold(models.Model):
+    """A member's place in a book's FIFO waitlist.
+
+    ``loan`` is set when a returned copy is allocated to the hold.
+    """
+
+    book = models.ForeignKey(Book, related_name="holds", on_delete=models.CASCADE)
+    member = models.ForeignKey(Member, related_name="holds", on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    loan = models.OneToOneField(
+        Loan, related_name="hold", null=True, blank=True, on_delete=models.SET_NULL
+    )
+    allocated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["book", "id"],
+                name="hold_waiting_idx",
+                condition=models.Q(allocated_at__isnull=True),
+            )
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["book", "member"],
+                condition=models.Q(allocated_at__isnull=True),
+                name="hold_one_waiting_per_member",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.member} waiting for {self.book}"
+
+
+class OutboxEvent(models.Model):
+    """An event recorded in the transaction that caused it.
+
+    ``relay_outbox`` publishes pending events to Celery once they are
+    committed, then deletes them.
+    """
+
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
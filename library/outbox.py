@@ -0,0 +1,49 @@
+import logging
+
+from django.db import transaction
+
+from .models import OutboxEvent
+
+LOAN_CREATED = "loan.created"
+HOLD_READY = "hold.ready"
+
+logger = logging.getLogger(__name__)
+
+
+def record(topic, payloads):
+    """Add events to the outbox, in the caller's transaction."""
+    OutboxEvent.objects.bulk_create(
+        OutboxEvent(topic=topic, payload=payload) for payload in payloads
+    )
+
+
+def relay(tasks, batch_size):
+    """Publish one batch of committed events and return how many there were.
+
+    Events are locked with SKIP LOCKED so relays can run side by side, and
+    each topic's payloads go out as a single ``tasks[topic].delay(payloads)``.
+    They are deleted only in the publishing transaction: if publishing or the
+    commit fails they are published again by the next relay (at least once).
+    Events whose topic has no task are logged with their payloads and
+    dropped, so they cannot hold up the events behind them.
+    """
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True).order_by("id")[
+                :batch_size
+            ]
+        )
+        by_topic = {}
+        for event in events:
+            by_topic.setdefault(event.topic, []).append(event.payload)
+        for topic, payloads in by_topic.items():
+            task = tasks.get(topic)
+            if task is None:
+                logger.error(
+                    f"Dropping {len(payloads)} outbox events for unknown topic "
+                    f"{topic!r}: {payloads}"
+                )
+                continue
+            task.delay(payloads)
+        OutboxEvent.objects.filter(id__in=[event.id for event in events]).delete()
+    return len(events)
@@ -0,0 +1,68 @@
+"""Watermark of the due dates whose overdue reminders have been sent.
+
+Loans only become overdue at day boundaries, so a reminder pass covers the
+due dates after the watermark up to yesterday and then advances it; a tick
+with nothing newly overdue reads one row instead of every unreturned loan.
+Loans saved with a due date the watermark has already passed rewind it, and
+returned loans drop out of the pending reminder index on their own.
+"""
+
+from datetime import timedelta
+
+from django.db.models import Min
+
+from .models import JobWatermark, Loan
+
+# JobWatermark row: ``day`` is the last due date whose reminders are all sent.
+WATERMARK = "overdue"
+
+
+def window(today):
+    """Return the ``(after, through)`` due dates still to remind, or None.
+
+    ``after`` is None until the first pass completes, meaning every due date
+    up to ``through``.
+    """
+    through = today - timedelta(days=1)
+    after = (
+        JobWatermark.objects.filter(name=WATERMARK)
+        .values_list("day", flat=True)
+        .first()
+    )
+    if after is not None and after >= through:
+        return None
+    return after, through
+
+
+def advance(after, through):
+    """Move the watermark from ``after`` to ``through`` after a pass.
+
+    Loans of the window still waiting for a reminder (claimed by a worker
+    that has not finished, or failed) hold it back so the next pass retries
+    them. A watermark rewound during the pass is left where it is.
+    """
+    pending = Loan.objects.filter(
+        is_returned=False, remainder_sent=False, due_date__lte=through
+    )
+    if after is not None:
+        pending = pending.filter(due_date__gt=after)
+    first_pending = pending.aggregate(first=Min("due_date"))["first"]
+    if first_pending is not None:
+        through = first_pending - timedelta(days=1)
+
+    if after is None:
+        JobWatermark.objects.get_or_create(name=WATERMARK, defaults={"day": through})
+    elif through > after:
+        JobWatermark.objects.filter(name=WATERMARK, day=after).update(day=through)
+
+
+def rewind(due_date):
+    """Make the next pass cover ``due_date`` again."""
+    JobWatermark.objects.filter(name=WATERMARK, day__gte=due_date).update(
+        day=due_date - timedelta(days=1)
+    )
+
+
+def reset():
+    """Forget the watermark; the next pass covers every past due date."""
+    JobWatermark.objects.filter(name=WATERMARK).delete()
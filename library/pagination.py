@@ -0,0 +1,39 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+PAGE_SIZE_QUERY_PARAM = settings.REST_FRAMEWORK.get("PAGE_SIZE_QUERY_PARAM")
+
+
+class KeysetPagination(CursorPagination):
+    """Keyset pagination over ``id`` with opaque cursors and no ``COUNT(*)``."""
+
+    ordering = "id"
+    page_size_query_param = PAGE_SIZE_QUERY_PARAM
+    max_page_size = 1000
+
+
+class LibraryPagination(PageNumberPagination):
+    """Page numbers by default; keyset cursors when the client opts in.
+
+    Clients opt in with ``?pagination=cursor`` on the first request and then
+    follow the ``next``/``previous`` links, which carry a ``cursor`` token.
+    """
+
+    page_size_query_param = PAGE_SIZE_QUERY_PARAM
+    max_page_size = 1000
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if (
+            request.query_params.get("pagination") == "cursor"
+            or self.keyset_class.cursor_query_param in request.query_params
+        ):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,58 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Book
+
+POSTGRES_SEARCH = """
+SELECT id FROM library_book, websearch_to_tsquery('english', %s) query
+WHERE search_vector @@ query
+ORDER BY ts_rank_cd(search_vector, query) DESC, id
+LIMIT %s
+"""
+
+SQLITE_SEARCH = """
+SELECT rowid FROM library_book_fts
+WHERE library_book_fts MATCH %s
+ORDER BY bm25(library_book_fts, 10.0, 10.0, 5.0), rowid
+LIMIT %s
+"""
+
+
+def fts5_query(text):
+    # Quote every term so user input can never be parsed as FTS5 syntax, and
+    # match prefixes so partial words still find titles.
+    terms = re.findall(r"\w+", text)
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search_book_ids(text, limit):
+    """Return the ids of the books best matching ``text``, best first.
+
+    Uses the maintained ``tsvector`` column and its GIN index on Postgres and
+    the FTS5 shadow table on SQLite; other backends fall back to substring
+    matching.
+    """
+    if connection.vendor == "postgresql":
+        sql, params = POSTGRES_SEARCH, [text, limit]
+    elif connection.vendor == "sqlite":
+        text = fts5_query(text)
+        if not text:
+            return []
+        sql, params = SQLITE_SEARCH, [text, limit]
+    else:
+        return list(
+            Book.objects.filter(
+                Q(title__icontains=text)
+                | Q(isbn=text)
+                | Q(author__first_name__icontains=text)
+                | Q(author__last_name__icontains=text)
+            )
+            .order_by("id")
+            .values_list("id", flat=True)[:limit]
+        )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
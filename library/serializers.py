@@ -2,16 +2,25 @@ from django.contrib.auth.models import User
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
+from .middleware import serializing
 from .models import Author, Book, Loan, Member
 
 
-class AuthorSerializer(serializers.ModelSerializer):
+class ProfiledSerializer(serializers.ModelSerializer):
+    """Reports the time spent building its data as the ``serialize`` phase."""
+
+    def to_representation(self, instance):
+        with serializing():
+            return super().to_representation(instance)
+
+
+class AuthorSerializer(ProfiledSerializer):
     class Meta:
         model = Author
         fields = "__all__"
 
 
-class BookSerializer(serializers.ModelSerializer):
+class BookSerializer(ProfiledSerializer):
     author = AuthorSerializer(read_only=True)
     author_id = serializers.PrimaryKeyRelatedField(
         queryset=Author.objects.all(), source="author", write_only=True
@@ -30,13 +39,13 @@ class BookSerializer(serializers.ModelSerializer):
         ]
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(ProfiledSerializer):
     class Meta:
         model = User
         fields = ["id", "username", "email"]
 
 
-class MemberSerializer(serializers.ModelSerializer):
+class MemberSerializer(ProfiledSerializer):
     user = UserSerializer(read_only=True)
     user_id = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.all(),
@@ -54,7 +63,7 @@ class MemberSerializer(serializers.ModelSerializer):
         fields = ["id", "user", "user_id", "membership_date"]
 
 
-class LoanSerializer(serializers.ModelSerializer):
+class LoanSerializer(ProfiledSerializer):
     book = BookSerializer(read_only=True)
     book_id = serializers.PrimaryKeyRelatedField(
         queryset=Book.objects.all(), source="book", write_only=True
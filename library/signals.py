@@ -0,0 +1,59 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import availability, cache, circulation, overdue
+from .middleware import record_query
+from .models import Author, Book, Loan, Member
+
+
+@receiver(post_delete, sender=Loan)
+def release_active_loan(sender, instance, **kwargs):
+    # Also fires for loans removed by a cascading Book/Member delete.
+    Member.adjust_active_loans({instance.counted_member_id: -1})
+
+
+@receiver(post_save, sender=Loan)
+def reschedule_overdue_reminder(sender, instance, **kwargs):
+    # A loan saved already past due may be behind the overdue watermark.
+    if (
+        not instance.is_returned
+        and not instance.remainder_sent
+        and instance.due_date < timezone.now().date()
+    ):
+        overdue.rewind(instance.due_date)
+
+
+@receiver([post_save, post_delete], sender=Author)
+def invalidate_authors(sender, **kwargs):
+    cache.invalidate("authors")
+
+
+@receiver([post_save, post_delete], sender=Book)
+@receiver([post_save, post_delete], sender=Loan)
+def invalidate_books(sender, **kwargs):
+    cache.invalidate("books")
+
+
+@receiver(post_save, sender=Book)
+def refresh_availability(sender, instance, **kwargs):
+    availability.refresh([instance.id])
+
+
+@receiver(post_save, sender=Book)
+def serve_waiting_holds(sender, instance, created, **kwargs):
+    # Copies added by an edit go to the waitlist before any walk-up checkout.
+    if not created and instance.available_copies > 0:
+        circulation.allocate_waiting(Book.objects.filter(id=instance.id))
+
+
+@receiver(post_delete, sender=Book)
+def forget_availability(sender, instance, **kwargs):
+    availability.forget(instance)
+
+
+@receiver(connection_created)
+def profile_queries(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
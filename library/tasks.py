@@ -1,11 +1,16 @@
 import logging
+import time
+from datetime import date, timedelta
 
-from celery import shared_task
+from celery import chord, group, shared_task
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection, send_mail, send_mass_mail
+from django.db import transaction
+from django.db.models import Max, Min, Q
 from django.utils.timezone import now
 
-from .models import Loan
+from . import archive, outbox, overdue, rollups
+from .models import Hold, Loan
 
 logger = logging.getLogger(__name__)
 
@@ -27,27 +32,257 @@ def send_loan_notification(loan_id):
         pass
 
 
+def loan_confirmation(user, loans):
+    if len(loans) == 1:
+        return EmailMessage(
+            subject="Book Loaned Successfully",
+            body=f'Hello {user.username},\n\nYou have successfully loaned "{loans[0].book.title}".\nPlease return it by the due date.',
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[user.email],
+        )
+    titles = "\n".join(f'- "{loan.book.title}"' for loan in loans)
+    return EmailMessage(
+        subject="Books Loaned Successfully",
+        body=f"Hello {user.username},\n\nYou have successfully loaned:\n{titles}\nPlease return them by the due date.",
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[user.email],
+    )
+
+
+def send_member_messages(items, build):
+    """Mail each member one message, ``build(user, items)``, for their ``items``.
+
+    ``items`` need ``member__user`` loaded; every message goes out over a
+    single connection to the mail backend.
+    """
+    by_member = {}
+    for item in sorted(items, key=lambda item: item.id):
+        by_member.setdefault(item.member_id, []).append(item)
+    messages = [
+        build(member_items[0].member.user, member_items)
+        for member_items in by_member.values()
+    ]
+    if messages:
+        get_connection(fail_silently=False).send_messages(messages)
+    return len(messages)
+
+
+def send_loan_confirmations(loans):
+    return send_member_messages(loans, loan_confirmation)
+
+
+def hold_ready(user, holds):
+    titles = "\n".join(f'- "{hold.book.title}"' for hold in holds)
+    return EmailMessage(
+        subject="Your Hold Is Ready",
+        body=f"Hello {user.username},\n\nA copy you were waiting for has been loaned to you:\n{titles}\nPlease return it by the due date.",
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[user.email],
+    )
+
+
 @shared_task
-def check_overdue_loans():
-    overdue_loans = Loan.objects.filter(
-        is_returned=False, due_date__lt=now().date(), remainder_sent=False
+def send_loan_notifications(loan_ids):
+    send_loan_confirmations(
+        Loan.objects.filter(id__in=loan_ids).select_related("member__user", "book")
     )
-    count = overdue_loans.count()
-    loan_word = "loan" if count in [0, 1] else "loans"
-    logger.info(f"Found {count} overdue {loan_word}")
 
-    for loan in overdue_loans:
-        user = loan.member.user
 
-        send_mail(
-            subject="Overdue Book Reminder",
-            message=f'Dear {user.username},\n\ndo note that "{loan.book.title} is overdue".\nPlease return it by the due date.',
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            fail_silently=False,
+@shared_task
+def notify_loans_created(events):
+    """Confirm newly created loans, one email per member for the batch."""
+    send_loan_notifications([event["loan_id"] for event in events])
+
+
+@shared_task
+def notify_holds_ready(events):
+    """Tell members their holds were filled, one email per member for the batch."""
+    holds = Hold.objects.filter(
+        id__in=[event["hold_id"] for event in events]
+    ).select_related("member__user", "book")
+    send_member_messages(holds, hold_ready)
+
+
+OUTBOX_TASKS = {
+    outbox.LOAN_CREATED: notify_loans_created,
+    outbox.HOLD_READY: notify_holds_ready,
+}
+
+
+@shared_task
+def relay_outbox():
+    """Publish committed outbox events to their tasks, batch by batch.
+
+    Runs from beat every ``OUTBOX_RELAY_INTERVAL`` seconds, so loans a member
+    takes out between two runs are confirmed in one email.
+    """
+    relayed = 0
+    while published := outbox.relay(OUTBOX_TASKS, settings.OUTBOX_BATCH_SIZE):
+        relayed += published
+    if relayed:
+        logger.info(f"Relayed {relayed} outbox events")
+    return relayed
+
+
+def overdue_reminder(loan):
+    user = loan.member.user
+    return (
+        "Overdue Book Reminder",
+        f'Dear {user.username},\n\ndo note that "{loan.book.title} is overdue".\nPlease return it by the due date.',
+        settings.DEFAULT_FROM_EMAIL,
+        [user.email],
+    )
+
+
+def claimable_overdue_loans(after=None, through=None):
+    """Unclaimed reminders for loans due after ``after`` and up to ``through``.
+
+    ``through`` defaults to yesterday: every loan that is overdue today.
+    """
+    stale = now() - timedelta(seconds=settings.OVERDUE_REMINDER_CLAIM_TIMEOUT)
+    loans = Loan.objects.filter(
+        Q(reminder_claimed_at__isnull=True) | Q(reminder_claimed_at__lt=stale),
+        is_returned=False,
+        due_date__lte=through or now().date() - timedelta(days=1),
+        remainder_sent=False,
+    )
+    if after is not None:
+        loans = loans.filter(due_date__gt=after)
+    return loans
+
+
+def as_date(value):
+    return None if value is None else date.fromisoformat(value)
+
+
+def as_text(value):
+    return None if value is None else value.isoformat()
+
+
+def claim_overdue_chunk(first_id=None, last_id=None, after=None, through=None):
+    """Claim up to one chunk of overdue loans for this worker.
+
+    Rows are picked with ``SELECT ... FOR UPDATE SKIP LOCKED`` where supported
+    and stamped with ``reminder_claimed_at`` before the lock is released, so
+    overlapping ticks and partitions never pick up the same loan twice.
+    """
+    loans = claimable_overdue_loans(after, through)
+    if first_id is not None:
+        loans = loans.filter(id__range=(first_id, last_id))
+
+    with transaction.atomic():
+        chunk = list(
+            loans.select_related("member__user", "book")
+            .select_for_update(skip_locked=True, of=("self",))
+            .order_by("id")[: settings.OVERDUE_REMINDER_CHUNK_SIZE]
+        )
+        if chunk:
+            Loan.objects.filter(id__in=[loan.id for loan in chunk]).update(
+                reminder_claimed_at=now()
+            )
+    return chunk
+
+
+def send_overdue_reminders(first_id=None, last_id=None, after=None, through=None):
+    started = time.monotonic()
+    sent = chunks = 0
+    while chunk := claim_overdue_chunk(first_id, last_id, after, through):
+        send_mass_mail([overdue_reminder(loan) for loan in chunk], fail_silently=False)
+        Loan.objects.filter(id__in=[loan.id for loan in chunk]).update(
+            remainder_sent=True
         )
+        sent += len(chunk)
+        chunks += 1
+    return {"sent": sent, "chunks": chunks, "seconds": time.monotonic() - started}
+
+
+def log_reminder_stats(stats):
+    sent, elapsed = stats["sent"], stats["seconds"]
+    loan_word = "loan" if sent in [0, 1] else "loans"
+    logger.info(
+        f"Sent reminders for {sent} overdue {loan_word} in {stats['chunks']} chunks, "
+        f"{elapsed:.2f}s ({sent / elapsed if elapsed else 0:.1f} loans/s)"
+    )
+
+
+@shared_task
+def check_overdue_loans():
+    """Remind the loans that became overdue since the last completed pass."""
+    due = overdue.window(now().date())
+    if due is None:
+        return {"sent": 0, "chunks": 0, "seconds": 0.0}
+    stats = send_overdue_reminders(after=due[0], through=due[1])
+    overdue.advance(*due)
+    log_reminder_stats(stats)
+    return {**stats, "seconds": round(stats["seconds"], 3)}
 
-        loan.remainder_sent = True
-        loan.save()
 
-        logger.info(f"Sent reminder for loan {loan.id} to {user.email}")
+@shared_task
+def remind_overdue_partition(first_id, last_id, after=None, through=None):
+    return send_overdue_reminders(first_id, last_id, as_date(after), as_date(through))
+
+
+@shared_task
+def summarize_overdue_reminders(results, started_at, after=None, through=None):
+    stats = {
+        "sent": sum(result["sent"] for result in results),
+        "chunks": sum(result["chunks"] for result in results),
+        "partitions": len(results),
+        "seconds": round(time.time() - started_at, 3),
+    }
+    if through is not None:
+        overdue.advance(as_date(after), as_date(through))
+    log_reminder_stats(stats)
+    return stats
+
+
+@shared_task
+def dispatch_overdue_reminders():
+    """Fan newly overdue reminders out over id-range partitions on all workers.
+
+    Only the due dates past the overdue watermark are read, so a tick costs
+    one row lookup until the next day boundary (or a rewind) brings new work.
+    """
+    due = overdue.window(now().date())
+    if due is None:
+        return None
+    bounds = claimable_overdue_loans(*due).aggregate(first=Min("id"), last=Max("id"))
+    if bounds["first"] is None:
+        logger.info("Found 0 overdue loans")
+        overdue.advance(*due)
+        return None
+
+    after, through = (as_text(day) for day in due)
+    partitions = max(1, settings.OVERDUE_REMINDER_PARTITIONS)
+    span = -(-(bounds["last"] - bounds["first"] + 1) // partitions)
+    header = group(
+        remind_overdue_partition.s(
+            start, min(start + span - 1, bounds["last"]), after, through
+        )
+        for start in range(bounds["first"], bounds["last"] + 1, span)
+    )
+    return chord(header)(summarize_overdue_reminders.s(time.time(), after, through)).id
+
+
+@shared_task
+def archive_returned_loans():
+    """Move loans returned more than LOAN_ARCHIVE_AFTER_DAYS ago to the archive."""
+    cutoff = now().date() - timedelta(days=settings.LOAN_ARCHIVE_AFTER_DAYS)
+    archived = 0
+    while moved := archive.archive_chunk(cutoff, settings.LOAN_ARCHIVE_CHUNK_SIZE):
+        archived += moved
+    logger.info(f"Archived {archived} loans returned before {cutoff}")
+    return archived
+
+
+@shared_task
+def update_circulation_rollups():
+    """Fold loans checked out or returned on closed days into the rollups."""
+    today = now().date()
+    counted = 0
+    while (
+        chunk := rollups.update_chunk(today, settings.ROLLUP_CHUNK_SIZE)
+    ) is not None:
+        counted += chunk
+    logger.info(f"Rolled up {counted} checkouts and returns before {today}")
+    return counted
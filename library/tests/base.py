@@ -26,6 +26,14 @@ class BaseLibraryAPITest(TestCase):
             book=self.book,
         )
 
+    def run_tasks_eagerly(self):
+        """Run ``.delay()``ed Celery tasks in process for the rest of the test."""
+        from library_system.celery import app
+
+        eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, "task_always_eager", eager)
+
     @staticmethod
     def inits():
         Author.objects.all().delete()
@@ -0,0 +1,58 @@
+from rest_framework import status
+
+from library.models import Book
+from library.tests.base import BaseLibraryAPITest
+
+
+class AsyncReadTests(BaseLibraryAPITest):
+    def setUp(self):
+        super().setUp()
+        Book.objects.bulk_create(
+            Book(
+                title=f"Async {i}", author=self.author, isbn=f"{i:013d}", genre="sci-fi"
+            )
+            for i in range(3)
+        )
+
+    def assertSamePayload(self, sync_url, async_url, params=None):
+        expected = self.client.get(sync_url, params).json()
+        response = self.client.get(async_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        actual = response.json()
+        if isinstance(expected, dict) and "next" in expected:
+            for link in ("next", "previous"):
+                expected[link] = expected[link] and expected[link].replace(
+                    sync_url, async_url
+                )
+        self.assertEqual(actual, expected)
+
+    def test_book_list_matches_sync(self):
+        """Test the async book list pages like the DRF endpoint"""
+        self.assertSamePayload("/api/books/", "/api/async/books/", {"page_size": 2})
+        self.assertSamePayload(
+            "/api/books/", "/api/async/books/", {"page": 2, "page_size": 2}
+        )
+        self.assertSamePayload("/api/books/", "/api/async/books/", {"genre": "sci-fi"})
+
+    def test_detail_matches_sync(self):
+        """Test async book and author details match the DRF endpoints"""
+        self.assertSamePayload(
+            f"/api/books/{self.book.id}/", f"/api/async/books/{self.book.id}/"
+        )
+        self.assertSamePayload(
+            f"/api/authors/{self.author.id}/", f"/api/async/authors/{self.author.id}/"
+        )
+        response = self.client.get("/api/async/books/999/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_author_list_matches_sync(self):
+        """Test the async author list matches the DRF endpoint"""
+        self.assertSamePayload("/api/authors/", "/api/async/authors/")
+
+    def test_top_active_members_matches_sync(self):
+        """Test the async leaderboard matches the DRF endpoint"""
+        self.assertSamePayload(
+            "/api/top-active-members/", "/api/async/top-active-members/"
+        )
+        response = self.client.get("/api/async/top-active-members/", {"limit": 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -63,3 +63,24 @@ class AuthorAPITests(BaseLibraryAPITest):
         self.assertEqual(author.first_name, "Jane")
         serialized_data = AuthorSerializer(author).data
         self.assertEqual(serialized_data["last_name"], "Smith")
+
+    def test_batch_authors(self):
+        """Test creating and then updating authors in batches"""
+        response = self.client.post(
+            "/api/authors/batch/",
+            [{"first_name": "Ada", "last_name": "Lovelace"}, {"first_name": "Alan"}],
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        created, invalid = response.data["results"]
+        self.assertIn("last_name", invalid["errors"])
+
+        response = self.client.patch(
+            "/api/authors/batch/",
+            [{"id": created["id"], "biography": "Analyst"}, {"id": 999}],
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data["results"][1]["errors"], {"id": ["Not found."]})
+        author = Author.objects.get(id=created["id"])
+        self.assertEqual((author.last_name, author.biography), ("Lovelace", "Analyst"))
@@ -1,6 +1,10 @@
+import json
+from unittest.mock import patch
+
+from django.core.cache import cache
 from rest_framework import status
 
-from library.models import Book, Loan
+from library.models import Author, Book, Hold, Loan
 from library.serializers import BookSerializer
 from library.tests.base import BaseLibraryAPITest
 
@@ -93,6 +97,140 @@ class BookAPITests(BaseLibraryAPITest):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("Active loan does not exist", response.data["error"])
 
+    def test_place_hold(self):
+        """Test placing holds on a book with no copies left"""
+        self.book.available_copies = 0
+        self.book.save()
+        url = f"/api/books/{self.book.id}/hold/"
+        response = self.client.post(url, {"member_id": self.member.id})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["position"], 1)
+        self.assertTrue(Hold.objects.filter(id=response.data["hold_id"]).exists())
+
+        response = self.client.post(url, {"member_id": self.member.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("already waiting", response.data["error"])
+
+    def test_place_hold_with_copies_available(self):
+        """Test a hold is refused while the book can be loaned"""
+        response = self.client.post(
+            f"/api/books/{self.book.id}/hold/", {"member_id": self.member.id}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Copies are available", response.data["error"])
+        self.assertFalse(Hold.objects.exists())
+
+    def batch_books(self, count, start=0):
+        return [
+            {
+                "title": f"Batch {i}",
+                "author_id": self.author.id,
+                "isbn": f"{5000000000000 + i}",
+                "genre": "fiction",
+                "available_copies": 1,
+            }
+            for i in range(start, start + count)
+        ]
+
+    def test_batch_create_books_set_based(self):
+        """Test batch creation validates all rows with a fixed number of queries"""
+        with self.assertNumQueries(5):
+            response = self.client.post(
+                "/api/books/batch/",
+                self.batch_books(2),
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        with self.assertNumQueries(5):
+            response = self.client.post(
+                "/api/books/batch/",
+                self.batch_books(50, start=2),
+                content_type="application/json",
+            )
+        self.assertEqual(response.data["written"], 50)
+        self.assertEqual(Book.objects.filter(title__startswith="Batch").count(), 52)
+
+    def test_batch_create_books_row_errors(self):
+        """Test batch creation reports per-row errors and writes the rest"""
+        rows = self.batch_books(4)
+        rows[1]["author_id"] = 999
+        rows[2]["isbn"] = self.book.isbn
+        rows[3]["isbn"] = rows[0]["isbn"]
+        response = self.client.post(
+            "/api/books/batch/", rows, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        first, unknown, taken, repeated = response.data["results"]
+        self.assertTrue(Book.objects.filter(id=first["id"]).exists())
+        self.assertIn("does not exist", unknown["errors"]["author_id"][0])
+        self.assertIn("already exists", taken["errors"]["isbn"][0])
+        self.assertIn("already exists", repeated["errors"]["isbn"][0])
+        self.assertEqual(Book.objects.count(), 2)
+
+    def test_batch_update_books(self):
+        """Test batch updates apply partial rows and refresh availability"""
+        cache.clear()
+        other = Author.objects.create(first_name="Other", last_name="Writer")
+        response = self.client.patch(
+            "/api/books/batch/",
+            [
+                {"id": self.book.id, "available_copies": 7, "author_id": other.id},
+                {"id": self.book.id, "title": "Twice"},
+                {"id": "x"},
+            ],
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data["written"], 1)
+        self.book.refresh_from_db()
+        self.assertEqual(
+            (self.book.available_copies, self.book.author_id, self.book.title),
+            (7, other.id, "We Code & Track v1"),
+        )
+        response = self.client.get("/api/books/availability/", {"id": self.book.id})
+        self.assertEqual(response.data["results"][0]["available_copies"], 7)
+
+    def test_batch_update_keeps_concurrent_checkout(self):
+        """Test a batch row only writes the fields it sends"""
+        from library import batch
+        from library.circulation import checkout
+
+        other = Book.objects.create(
+            title="Other",
+            author=self.author,
+            isbn="9999999999999",
+            genre="fiction",
+            available_copies=3,
+        )
+        check_uniques = batch.check_uniques
+
+        def race(*args):
+            # A checkout lands between the batch's read and its write.
+            checkout(other.id, self.member.id)
+            return check_uniques(*args)
+
+        with patch("library.batch.check_uniques", side_effect=race):
+            response = self.client.patch(
+                "/api/books/batch/",
+                [
+                    {"id": self.book.id, "available_copies": 5},
+                    {"id": other.id, "title": "Renamed"},
+                ],
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        other.refresh_from_db()
+        self.assertEqual((other.title, other.available_copies), ("Renamed", 2))
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 5)
+
+    def test_batch_requires_list(self):
+        """Test batch endpoints reject payloads that are not a list"""
+        response = self.client.post(
+            "/api/books/batch/", {"title": "x"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_book_serializer(self):
         """Test BookSerializer serialization and deserialization"""
         data = {
@@ -108,3 +246,194 @@ class BookAPITests(BaseLibraryAPITest):
         self.assertEqual(book.title, "Serialized Book")
         serialized_data = BookSerializer(book).data
         self.assertEqual(serialized_data["author"]["id"], self.author.id)
+
+    def test_list_books_cached_until_checkout(self):
+        """Test book pages are cached and retired by a checkout"""
+        url = "/api/books/"
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "HIT")
+
+        self.client.post(
+            f"/api/books/{self.book.id}/loan/", {"member_id": self.member.id}
+        )
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"][0]["available_copies"], 1)
+
+    def test_retrieve_book_etag(self):
+        """Test a matching If-None-Match gets a 304 until the book changes"""
+        url = f"/api/books/{self.book.id}/"
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+        self.author.last_name = "Renamed"
+        self.author.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["author"]["last_name"], "Renamed")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_match_is_exact(self):
+        """Test If-None-Match compares whole tags, weakly, and honours *"""
+        url = f"/api/books/{self.book.id}/"
+        etag = self.client.get(url)["ETag"]
+        for header, expected in (
+            (f'"other", W/{etag}', status.HTTP_304_NOT_MODIFIED),
+            ("*", status.HTTP_304_NOT_MODIFIED),
+            (etag.strip('"'), status.HTTP_200_OK),
+            (f'"x{etag[1:-1]}x"', status.HTTP_200_OK),
+            (f'"{etag}"', status.HTTP_200_OK),
+        ):
+            with self.subTest(header=header):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=header)
+                self.assertEqual(response.status_code, expected)
+
+    def test_availability_by_id_and_isbn(self):
+        """Test availability for many books in one call, missing ones listed"""
+        cache.clear()
+        other = Book.objects.create(
+            title="Badge Book",
+            author=self.author,
+            isbn="3344556677889",
+            genre="fiction",
+            available_copies=4,
+        )
+        url = (
+            f"/api/books/availability/?id={self.book.id}&id=999999"
+            f"&isbn={other.isbn}&isbn={self.book.isbn}&isbn=0000000000000"
+        )
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"],
+            [
+                {"id": self.book.id, "isbn": self.book.isbn, "available_copies": 2},
+                {"id": other.id, "isbn": other.isbn, "available_copies": 4},
+            ],
+        )
+        self.assertEqual(response.data["missing"], [999999, "0000000000000"])
+
+    def test_availability_written_through_on_loan(self):
+        """Test checkouts and returns update cached availability in place"""
+        cache.clear()
+        url = f"/api/books/availability/?isbn={self.book.isbn}"
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                f"/api/books/{self.book.id}/loan/", {"member_id": self.member.id}
+            )
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.data["results"][0]["available_copies"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                f"/api/books/{self.book.id}/return_book/",
+                {"member_id": self.member.id},
+            )
+        with self.assertNumQueries(0):
+            response = self.client.get(f"/api/books/availability/?id={self.book.id}")
+        self.assertEqual(response.data["results"][0]["available_copies"], 2)
+
+    def test_availability_forgets_old_isbn(self):
+        """Test a book's old ISBN stops resolving once the ISBN changes"""
+        cache.clear()
+        old_isbn = self.book.isbn
+        url = "/api/books/availability/"
+        self.client.get(url, {"isbn": old_isbn})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                f"/api/books/{self.book.id}/",
+                {"isbn": "2222222222222"},
+                content_type="application/json",
+            )
+        response = self.client.get(url, {"isbn": old_isbn})
+        self.assertEqual(response.data["missing"], [old_isbn])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                "/api/books/batch/",
+                [{"id": self.book.id, "isbn": "3333333333333"}],
+                content_type="application/json",
+            )
+        response = self.client.get(url, {"isbn": "2222222222222"})
+        self.assertEqual(response.data["missing"], ["2222222222222"])
+        response = self.client.get(url, {"isbn": "3333333333333"})
+        self.assertEqual(response.data["results"][0]["id"], self.book.id)
+
+    def test_availability_requires_books(self):
+        """Test availability rejects empty, oversized and malformed requests"""
+        for query in ["", "?id=x", "?" + "&".join(f"id={i}" for i in range(501))]:
+            response = self.client.get(f"/api/books/availability/{query}")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_books(self):
+        """Test ranked search over titles, ISBNs and author names"""
+        other_author = Author.objects.create(first_name="Ada", last_name="Lovelace")
+        Book.objects.create(
+            title="Notes on the Analytical Engine",
+            author=other_author,
+            isbn="9780000000001",
+            genre="nonfiction",
+        )
+        Book.objects.create(
+            title="Tracking Engines",
+            author=self.author,
+            isbn="9780000000002",
+            genre="fiction",
+        )
+
+        response = self.client.get("/api/books/search/", {"q": "engine"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+
+        response = self.client.get("/api/books/search/", {"q": "lovelace"})
+        self.assertEqual(
+            [book["title"] for book in response.data],
+            ["Notes on the Analytical Engine"],
+        )
+        response = self.client.get("/api/books/search/", {"q": "1111234567890"})
+        self.assertEqual([book["id"] for book in response.data], [self.book.id])
+
+    def test_search_follows_author_renames(self):
+        """Test the search index is maintained when an author is renamed"""
+        self.author.last_name = "Hopper"
+        self.author.save()
+        response = self.client.get("/api/books/search/", {"q": "hopper"})
+        self.assertEqual([book["id"] for book in response.data], [self.book.id])
+        response = self.client.get("/api/books/search/", {"q": "Objects"})
+        self.assertEqual(response.data, [])
+
+    def test_search_requires_query(self):
+        """Test search without q is rejected"""
+        response = self.client.get("/api/books/search/", {"q": " "})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_books(self):
+        """Test books stream as NDJSON filtered like the list endpoint"""
+        Book.objects.create(
+            title="Other", author=self.author, isbn="9780000000003", genre="fiction"
+        )
+        response = self.client.get("/api/books/export/", {"genre": "biography"})
+        rows = [json.loads(line) for line in response.streaming_content]
+        self.assertEqual(
+            rows,
+            [
+                {
+                    "id": self.book.id,
+                    "title": "We Code & Track v1",
+                    "isbn": "1111234567890",
+                    "genre": "biography",
+                    "available_copies": 2,
+                    "author_id": self.author.id,
+                    "author__first_name": "iChux",
+                    "author__last_name": "Objects",
+                }
+            ],
+        )
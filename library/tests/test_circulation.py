@@ -0,0 +1,159 @@
+from django.contrib.auth.models import User
+from django.core import mail
+from rest_framework import status
+
+from library import circulation
+from library.models import Book, Hold, Loan, Member, OutboxEvent
+from library.tasks import relay_outbox
+from library.tests.base import BaseLibraryAPITest
+
+
+class CirculationTests(BaseLibraryAPITest):
+    def test_checkout_takes_a_copy(self):
+        """Test checkout decrements copies and creates the loan together"""
+        loan = circulation.checkout(self.book.id, self.member.id)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 1)
+        self.assertEqual(loan.book_id, self.book.id)
+        self.assertFalse(loan.is_returned)
+
+    def test_checkout_never_oversells(self):
+        """Test checkout stops at zero copies without creating loans"""
+        circulation.checkout(self.book.id, self.member.id)
+        circulation.checkout(self.book.id, self.member.id)
+        with self.assertRaises(circulation.NoCopiesAvailable):
+            circulation.checkout(self.book.id, self.member.id)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 0)
+        self.assertEqual(Loan.objects.filter(book=self.book).count(), 3)
+
+    def test_checkout_unknown_member(self):
+        """Test checkout with a missing member leaves copies untouched"""
+        for member_id in (999, None, "abc"):
+            with self.assertRaises(circulation.MemberNotFound):
+                circulation.checkout(self.book.id, member_id)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 2)
+
+    def test_checkout_unknown_book(self):
+        """Test checkout of a missing book reports no copies"""
+        with self.assertRaises(circulation.NoCopiesAvailable):
+            circulation.checkout(999, self.member.id)
+
+    def test_return_book_restores_copy_once(self):
+        """Test a loan can only be returned once"""
+        circulation.return_book(self.book.id, self.member.id)
+        with self.assertRaises(circulation.ActiveLoanNotFound):
+            circulation.return_book(self.book.id, self.member.id)
+        self.loan.refresh_from_db()
+        self.assertTrue(self.loan.is_returned)
+        self.assertEqual(Book.objects.get(id=self.book.id).available_copies, 3)
+
+    def test_return_book_oldest_loan_first(self):
+        """Test returning with several active loans closes the oldest"""
+        newer = circulation.checkout(self.book.id, self.member.id)
+        returned = circulation.return_book(self.book.id, self.member.id)
+        self.assertEqual(returned.id, self.loan.id)
+        newer.refresh_from_db()
+        self.assertFalse(newer.is_returned)
+
+    def waiting_members(self, count):
+        return [
+            Member.objects.create(
+                user=User.objects.create_user(
+                    username=f"waiting-{i}", email=f"waiting-{i}@example.com"
+                )
+            )
+            for i in range(count)
+        ]
+
+    def test_return_allocates_to_first_hold(self):
+        """Test a returned copy is loaned to the oldest waiting hold"""
+        Book.objects.filter(id=self.book.id).update(available_copies=0)
+        first, second = self.waiting_members(2)
+        hold, position = circulation.place_hold(self.book.id, first.id)
+        self.assertEqual(position, 1)
+        self.assertEqual(circulation.place_hold(self.book.id, second.id)[1], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            circulation.return_book(self.book.id, self.member.id)
+
+        hold.refresh_from_db()
+        self.assertIsNotNone(hold.allocated_at)
+        self.assertEqual(hold.loan.member_id, first.id)
+        self.assertFalse(hold.loan.is_returned)
+        self.assertEqual(Book.objects.get(id=self.book.id).available_copies, 0)
+        self.assertEqual(
+            Hold.objects.filter(allocated_at__isnull=True).get().member_id, second.id
+        )
+        self.assertEqual(OutboxEvent.objects.get().payload, {"hold_id": hold.id})
+
+        self.run_tasks_eagerly()
+        relay_outbox()
+        self.assertEqual(
+            [(message.to[0], message.subject) for message in mail.outbox],
+            [("waiting-0@example.com", "Your Hold Is Ready")],
+        )
+
+    def test_checkout_leaves_shelved_copies_to_holds(self):
+        """Test walk-up checkouts cannot take copies a waiting hold is owed"""
+        first, second = self.waiting_members(2)
+        Book.objects.filter(id=self.book.id).update(available_copies=0)
+        circulation.place_hold(self.book.id, first.id)
+        Book.objects.filter(id=self.book.id).update(available_copies=1)
+
+        with self.assertRaises(circulation.NoCopiesAvailable):
+            circulation.checkout(self.book.id, second.id)
+        result = circulation.bulk_checkout(
+            [{"book_id": self.book.id, "member_id": second.id}]
+        )
+        self.assertEqual(result[0]["error"], "No available copies.")
+        self.assertEqual(Book.objects.get(id=self.book.id).available_copies, 1)
+
+    def test_book_edits_serve_waiting_holds(self):
+        """Test copies added by an edit or a batch go to the waitlist first"""
+        first, second, third = self.waiting_members(3)
+        Book.objects.filter(id=self.book.id).update(available_copies=0)
+        circulation.place_hold(self.book.id, first.id)
+        circulation.place_hold(self.book.id, second.id)
+
+        response = self.client.patch(
+            f"/api/books/{self.book.id}/",
+            {"available_copies": 1},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(
+            f"/api/books/{self.book.id}/loan/", {"member_id": third.id}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.patch(
+            "/api/books/batch/",
+            [{"id": self.book.id, "available_copies": 1}],
+            content_type="application/json",
+        )
+
+        self.assertEqual(Book.objects.get(id=self.book.id).available_copies, 0)
+        self.assertEqual(
+            list(Hold.objects.order_by("id").values_list("loan__member_id", flat=True)),
+            [first.id, second.id],
+        )
+
+    def test_allocate_available_drains_shelf_into_holds(self):
+        """Test copies put back on the shelf are handed to waiting holds"""
+        Book.objects.filter(id=self.book.id).update(available_copies=0)
+        members = self.waiting_members(3)
+        for member in members:
+            circulation.place_hold(self.book.id, member.id)
+        Book.objects.filter(id=self.book.id).update(available_copies=2)
+
+        self.assertEqual(circulation.allocate_available(self.book.id), 2)
+        self.assertEqual(Book.objects.get(id=self.book.id).available_copies, 0)
+        self.assertEqual(
+            list(
+                Hold.objects.filter(allocated_at__isnull=False)
+                .order_by("id")
+                .values_list("loan__member_id", flat=True)
+            ),
+            [members[0].id, members[1].id],
+        )
@@ -0,0 +1,86 @@
+import threading
+
+from django.test import SimpleTestCase
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+
+from library_system.pooled_postgresql.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.status = TRANSACTION_STATUS_IDLE
+        self.rolled_back = False
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rolled_back = True
+        self.status = TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def make_pool(self, **options):
+        options = {
+            "min_size": 0,
+            "max_size": 2,
+            "timeout": 0.05,
+            "health_check_interval": 30,
+            **options,
+        }
+        return ConnectionPool(FakeConnection, **options)
+
+    def test_checked_in_connection_is_reused(self):
+        """A returned connection is handed out again instead of a new one."""
+        pool = self.make_pool()
+        connection = pool.checkout()
+        pool.checkin(connection)
+        self.assertIs(pool.checkout(), connection)
+        stats = pool.stats()
+        self.assertEqual(stats["created"], 1)
+        self.assertEqual(stats["checkouts"], 2)
+
+    def test_min_size_is_prefilled(self):
+        """The first checkout opens connections up to min_size."""
+        pool = self.make_pool(min_size=2)
+        pool.checkout()
+        self.assertEqual(pool.stats()["size"], 2)
+        self.assertEqual(pool.stats()["idle"], 1)
+
+    def test_checkout_times_out_when_exhausted(self):
+        """Checkout waits for a free slot, then raises PoolTimeout."""
+        pool = self.make_pool(max_size=1)
+        pool.checkout()
+        with self.assertRaises(PoolTimeout):
+            pool.checkout()
+        self.assertEqual(pool.stats()["waits"], 1)
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_waiter_gets_returned_connection(self):
+        """A waiting checkout receives the connection another thread returns."""
+        pool = self.make_pool(max_size=1, timeout=5)
+        connection = pool.checkout()
+        threading.Timer(0.05, pool.checkin, [connection]).start()
+        self.assertIs(pool.checkout(), connection)
+
+    def test_open_transaction_is_rolled_back(self):
+        """Connections come back to the pool outside any transaction."""
+        pool = self.make_pool()
+        connection = pool.checkout()
+        connection.status = TRANSACTION_STATUS_INTRANS
+        pool.checkin(connection)
+        self.assertTrue(connection.rolled_back)
+
+    def test_closed_connection_is_replaced(self):
+        """A connection that died while idle is discarded on checkout."""
+        pool = self.make_pool()
+        connection = pool.checkout()
+        pool.checkin(connection)
+        connection.closed = 2
+        self.assertIsNot(pool.checkout(), connection)
+        self.assertEqual(pool.stats()["discarded"], 1)
+        self.assertEqual(pool.stats()["size"], 1)
@@ -0,0 +1,70 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+
+from library.models import Author, Book, Loan
+from library.renderers import FastJSONRenderer
+from library.tests.base import BaseLibraryAPITest
+
+
+class FastListTests(BaseLibraryAPITest):
+    def setUp(self):
+        super().setUp()
+        author = Author.objects.create(
+            first_name="Zoë", last_name="Ångström", biography="line\u2028break"
+        )
+        book = Book.objects.create(
+            title="Über “quotes”", author=author, isbn="5556667778889", genre="sci-fi"
+        )
+        Loan.objects.create(member=self.member, book=book, is_returned=True)
+
+    def fetch(self, url, fast):
+        cache.clear()
+        with self.settings(FAST_LIST_SERIALIZATION=fast):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def test_fast_lists_match_serializers(self):
+        """Test fast list payloads are byte-for-byte the serializer output"""
+        for url in [
+            "/api/authors/",
+            "/api/books/",
+            "/api/books/?genre=sci-fi",
+            "/api/books/?pagination=cursor&page_size=1",
+            "/api/members/",
+            "/api/loans/",
+            "/api/loans/?is_returned=true",
+            "/api/loans/?page=2&page_size=1",
+        ]:
+            with self.subTest(url=url):
+                self.assertEqual(self.fetch(url, True), self.fetch(url, False))
+
+    def test_fast_loan_list_queries(self):
+        """Test the fast loan list is one joined query plus the count"""
+        cache.clear()
+        with self.settings(FAST_LIST_SERIALIZATION=True), self.assertNumQueries(2):
+            self.client.get("/api/loans/")
+
+    def test_renderer_matches_json_renderer(self):
+        """Test orjson output matches the stock renderer, or falls back to it"""
+        for data in [
+            {"text": "Zoë\u2029", "nested": [1, 2.5, None, True]},
+            {1: "int keys"},
+            {"big": 2**70},
+        ]:
+            with self.subTest(data=data), self.settings(FAST_LIST_SERIALIZATION=1):
+                self.assertEqual(
+                    FastJSONRenderer().render(data), JSONRenderer().render(data)
+                )
+
+    def test_renderer_is_opt_in(self):
+        """Test orjson only encodes responses when FAST_LIST_SERIALIZATION is on"""
+        for fast, calls in ((0, 0), (1, 1)):
+            with self.settings(FAST_LIST_SERIALIZATION=fast):
+                with patch(
+                    "library.renderers.orjson.dumps", return_value=b"{}"
+                ) as dumps:
+                    FastJSONRenderer().render({"id": 1})
+            self.assertEqual(dumps.call_count, calls)
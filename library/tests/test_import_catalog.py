@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+
+from library import circulation
+from library.models import Author, Book
+from library.tests.base import BaseLibraryAPITest
+
+CSV_CATALOG = """title,isbn,genre,available_copies,author_first_name,author_last_name
+Imported One,9000000000001,fiction,2,Ursula,Le Guin
+Imported Two,9000000000002,sci-fi,1,Ursula,Le Guin
+We Code & Track v2,1111234567890,biography,5,iChux,Objects
+Bad Genre,9000000000003,poetry,1,Ursula,Le Guin
+Imported Three,9000000000004,nonfiction,,Mary,Beard
+"""
+
+
+class ImportCatalogTests(BaseLibraryAPITest):
+    def write(self, suffix, content):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, "w") as catalog:
+            catalog.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def import_catalog(self, path, *args):
+        out = StringIO()
+        call_command("import_catalog", path, *args, stdout=out)
+        return out.getvalue()
+
+    def test_import_csv(self):
+        """Test a CSV catalog upserts books and deduplicates authors"""
+        output = self.import_catalog(self.write(".csv", CSV_CATALOG), "--batch-size=2")
+        self.assertIn("Imported 4 books (1 skipped)", output)
+        self.assertEqual(Book.objects.count(), 4)
+        self.assertEqual(Author.objects.filter(last_name="Le Guin").count(), 1)
+        self.assertEqual(Author.objects.count(), 3)
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.title, "We Code & Track v2")
+        # Five copies in the catalog, one of them out on self.loan.
+        self.assertEqual(self.book.available_copies, 4)
+        self.assertEqual(self.book.author_id, self.author.id)
+        self.assertEqual(Book.objects.get(isbn="9000000000004").available_copies, 1)
+
+    def test_import_keeps_copies_on_loan(self):
+        """Test re-importing a book does not put copies on loan back on the shelf"""
+        Book.objects.filter(id=self.book.id).update(available_copies=0)
+        catalog = (
+            "title,isbn,genre,available_copies,author_first_name,author_last_name\n"
+            f"Again,{self.book.isbn},fiction,1,iChux,Objects\n"
+        )
+        self.import_catalog(self.write(".csv", catalog))
+        self.assertEqual(Book.objects.get(id=self.book.id).available_copies, 0)
+
+    def test_import_serves_waiting_holds(self):
+        """Test copies added by an import go to the waitlist first"""
+        Book.objects.filter(id=self.book.id).update(available_copies=0)
+        hold, _ = circulation.place_hold(self.book.id, self.member.id)
+        self.import_catalog(self.write(".csv", CSV_CATALOG))
+
+        hold.refresh_from_db()
+        self.assertEqual(hold.loan.book_id, self.book.id)
+        self.assertEqual(Book.objects.get(id=self.book.id).available_copies, 3)
+
+    def test_import_ndjson(self):
+        """Test an NDJSON catalog is imported the same way"""
+        rows = [
+            {
+                "title": "Json Book",
+                "isbn": "9000000000010",
+                "genre": "fiction",
+                "available_copies": 3,
+                "author_first_name": "iChux",
+                "author_last_name": "Objects",
+            }
+        ]
+        path = self.write(".ndjson", "\n".join(json.dumps(row) for row in rows))
+        self.import_catalog(path)
+        book = Book.objects.get(isbn="9000000000010")
+        self.assertEqual(book.author_id, self.author.id)
+        self.assertEqual(book.available_copies, 3)
+
+    def test_resume_from_checkpoint(self):
+        """Test an interrupted import resumes after the last committed batch"""
+        path = self.write(".csv", CSV_CATALOG)
+        lines = CSV_CATALOG.splitlines(keepends=True)
+        with open(f"{path}.checkpoint", "w") as checkpoint:
+            json.dump(
+                {
+                    "path": os.path.abspath(path),
+                    "offset": len("".join(lines[:3]).encode()),
+                    "imported": 2,
+                },
+                checkpoint,
+            )
+
+        output = self.import_catalog(path)
+        self.assertIn("Resuming", output)
+        self.assertFalse(Book.objects.filter(isbn="9000000000001").exists())
+        self.assertTrue(Book.objects.filter(isbn="9000000000004").exists())
+        self.assertFalse(os.path.exists(f"{path}.checkpoint"))
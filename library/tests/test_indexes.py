@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+from library.circulation import active_loans
+from library.models import Book
+from library.tasks import claimable_overdue_loans
+from library.tests.base import BaseLibraryAPITest
+
+
+class QueryPlanTests(BaseLibraryAPITest):
+    """Hot queries must keep using their indexes as the schema evolves."""
+
+    def assertUsesIndex(self, queryset, index_name):
+        if connection.vendor == "postgresql":
+            # Tiny test tables are cheaper to scan; make the planner show
+            # whether the index can serve the query at all.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f"{index_name} not used:\n{plan}")
+        return plan
+
+    def test_return_book_uses_active_loan_index(self):
+        """Test the return lookup searches the partial active loan index"""
+        self.assertUsesIndex(
+            active_loans(self.book.id, self.member.id), "loan_active_idx"
+        )
+
+    def test_overdue_scan_uses_reminder_index(self):
+        """Test overdue reminders read one due date window of the pending index"""
+        yesterday = timezone.now().date() - timedelta(days=1)
+        plan = self.assertUsesIndex(
+            claimable_overdue_loans(yesterday - timedelta(days=1), yesterday).order_by(
+                "id"
+            ),
+            "loan_overdue_due_idx",
+        )
+        # Both ends of the window bound the index range, not a filter.
+        self.assertRegex(
+            plan, r"(Index Cond: |INDEX \w+ \().*due_date\s*>[^<\n]*due_date\s*<"
+        )
+
+    def test_genre_filter_uses_genre_index(self):
+        """Test the genre filter reads books through the genre index"""
+        self.assertUsesIndex(
+            Book.objects.filter(genre="fiction").order_by("id"), "book_genre_idx"
+        )
+
+    def test_author_last_name_filter_uses_index(self):
+        """Test the author__last_name filter finds authors through the index"""
+        self.assertUsesIndex(
+            Book.objects.filter(author__last_name="Objects").order_by("id"),
+            "author_last_name_idx",
+        )
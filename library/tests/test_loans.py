@@ -1,11 +1,25 @@
+import json
+from contextlib import contextmanager
+from datetime import timedelta
 from unittest.mock import patch
 
+from django.contrib.auth.models import User
+from django.core import mail
+from django.db import connection
+from django.utils import timezone
 from rest_framework import status
 
-from library.models import Book
+from library.models import Book, Hold, Loan, LoanArchive, Member, OutboxEvent
 from library.serializers import LoanSerializer
 from library.tests.base import BaseLibraryAPITest
 
+POSTGRES_LOAN_READS = """
+SELECT COALESCE(SUM(idx_tup_read), 0)
+    + (SELECT COALESCE(seq_tup_read, 0) FROM pg_stat_xact_user_tables
+       WHERE relname = 'library_loan')
+FROM pg_stat_xact_user_indexes WHERE relname = 'library_loan'
+"""
+
 
 class LoanAPITests(BaseLibraryAPITest):
     @patch("library.tasks.send_mail")
@@ -39,3 +53,402 @@ class LoanAPITests(BaseLibraryAPITest):
         serialized_data = LoanSerializer(loan).data
         self.assertEqual(serialized_data["book"]["title"], "Serialized Loan Book")
         self.assertEqual(serialized_data["member"]["user"]["username"], "tracker")
+
+    def test_bulk_checkout(self):
+        """Test checking out several books in one request"""
+        other = Book.objects.create(
+            title="Bulk Book",
+            author=self.author,
+            isbn="2233445566778",
+            genre="fiction",
+            available_copies=1,
+        )
+        data = [
+            {"book_id": self.book.id, "member_id": self.member.id},
+            {"book_id": other.id, "member_id": self.member.id},
+        ]
+        response = self.client.post(
+            "/api/loans/bulk_checkout/", data, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["loaned"], 2)
+        self.book.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 1)
+        self.assertEqual(other.available_copies, 0)
+        self.assertEqual(Loan.objects.filter(member=self.member).count(), 3)
+        self.assertCountEqual(
+            OutboxEvent.objects.values_list("payload", flat=True),
+            [{"loan_id": result["loan_id"]} for result in response.data["results"]],
+        )
+
+    def test_bulk_checkout_partial_failure(self):
+        """Test bulk checkout reports per-item errors without oversell"""
+        data = {
+            "loans": [
+                {"book_id": self.book.id, "member_id": self.member.id},
+                {"book_id": self.book.id, "member_id": self.member.id},
+                {"book_id": self.book.id, "member_id": self.member.id},
+                {"book_id": self.book.id, "member_id": 999},
+                {"book_id": "x"},
+            ]
+        }
+        response = self.client.post(
+            "/api/loans/bulk_checkout/", data, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        results = response.data["results"]
+        self.assertEqual(
+            [("loan_id" in result) for result in results],
+            [True, True, False, False, False],
+        )
+        self.assertIn("No available copies", results[2]["error"])
+        self.assertIn("Member does not exist", results[3]["error"])
+        self.assertIn("required", results[4]["error"])
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 0)
+        self.assertEqual(OutboxEvent.objects.count(), 2)
+
+    def test_bulk_checkout_invalid_payload(self):
+        """Test bulk checkout rejects a payload that is not a list"""
+        response = self.client.post(
+            "/api/loans/bulk_checkout/",
+            {"book_id": self.book.id},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_checkout_too_many_loans(self):
+        """Test bulk checkout rejects more than BATCH_MAX_ROWS loans"""
+        data = [{"book_id": self.book.id, "member_id": self.member.id}] * 3
+        with self.settings(BATCH_MAX_ROWS=2):
+            response = self.client.post(
+                "/api/loans/bulk_checkout/", data, content_type="application/json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["error"], "At most 2 loans per batch.")
+        self.assertEqual(Loan.objects.count(), 1)
+
+    def test_send_loan_notifications_one_mail_per_member(self):
+        from library.tasks import send_loan_notifications
+
+        extra = Loan.objects.create(member=self.member, book=self.book)
+        send_loan_notifications([self.loan.id, extra.id])
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_relay_outbox_coalesces_per_member(self):
+        """Test relayed loan events are confirmed in one email per member"""
+        from library.circulation import checkout
+        from library.tasks import relay_outbox
+
+        other = Member.objects.create(
+            user=User.objects.create_user(username="other", email="other@example.com")
+        )
+        checkout(self.book.id, self.member.id)
+        checkout(self.book.id, other.id)
+        self.book.available_copies = 1
+        self.book.save()
+        checkout(self.book.id, self.member.id)
+        self.assertEqual(OutboxEvent.objects.count(), 3)
+
+        self.run_tasks_eagerly()
+        with self.settings(OUTBOX_BATCH_SIZE=10):
+            self.assertEqual(relay_outbox(), 3)
+
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertEqual(
+            [(message.to[0], message.subject) for message in mail.outbox],
+            [
+                ("tracker@packer.com", "Books Loaned Successfully"),
+                ("other@example.com", "Book Loaned Successfully"),
+            ],
+        )
+
+    def test_relay_outbox_keeps_events_when_publishing_fails(self):
+        """Test outbox events stay queued until they are published"""
+        from library.circulation import checkout
+        from library.tasks import notify_loans_created, relay_outbox
+
+        checkout(self.book.id, self.member.id)
+        with patch.object(
+            notify_loans_created, "delay", side_effect=ConnectionError
+        ), self.assertRaises(ConnectionError):
+            relay_outbox()
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+
+        self.run_tasks_eagerly()
+        relay_outbox()
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_relay_outbox_drops_unknown_topics(self):
+        """Test events without a task are dropped instead of blocking the outbox"""
+        from library.circulation import checkout
+        from library.tasks import notify_loans_created, relay_outbox
+
+        OutboxEvent.objects.create(topic="loan.retired", payload={"loan_id": 1})
+        loan = checkout(self.book.id, self.member.id)
+        with patch.object(notify_loans_created, "delay") as delay, self.assertLogs(
+            "library.outbox", "ERROR"
+        ):
+            self.assertEqual(relay_outbox(), 2)
+        delay.assert_called_once_with([{"loan_id": loan.id}])
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_check_overdue_loans_in_chunks(self):
+        """Test overdue reminders are sent per chunk with constant queries"""
+        from library.tasks import check_overdue_loans
+
+        overdue = timezone.now().date() - timedelta(days=1)
+        Loan.objects.filter(id=self.loan.id).update(due_date=overdue)
+        Loan.objects.bulk_create(
+            Loan(member=self.member, book=self.book, due_date=overdue) for _ in range(4)
+        )
+        Loan.objects.create(member=self.member, book=self.book)
+
+        with self.settings(OVERDUE_REMINDER_CHUNK_SIZE=3), self.assertNumQueries(19):
+            stats = check_overdue_loans()
+
+        self.assertEqual(stats["sent"], 5)
+        self.assertEqual(stats["chunks"], 2)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(mail.outbox[0].to, ["tracker@packer.com"])
+        self.assertEqual(Loan.objects.filter(remainder_sent=True).count(), 5)
+
+        check_overdue_loans()
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_claimed_overdue_loans_are_skipped(self):
+        """Test loans claimed by another worker are not reminded twice"""
+        from library.tasks import check_overdue_loans
+
+        overdue = timezone.now().date() - timedelta(days=1)
+        fresh, stale = Loan.objects.bulk_create(
+            [
+                Loan(member=self.member, book=self.book, due_date=overdue),
+                Loan(member=self.member, book=self.book, due_date=overdue),
+            ]
+        )
+        Loan.objects.filter(id=fresh.id).update(reminder_claimed_at=timezone.now())
+        Loan.objects.filter(id=stale.id).update(
+            reminder_claimed_at=timezone.now() - timedelta(hours=1)
+        )
+
+        self.assertEqual(check_overdue_loans()["sent"], 1)
+        self.assertEqual(
+            list(Loan.objects.filter(remainder_sent=True).values_list("id", flat=True)),
+            [stale.id],
+        )
+
+    @contextmanager
+    def loan_reads(self):
+        """Measure the ``library_loan`` work done inside the block.
+
+        Postgres reports the rows read from the table and its indexes; SQLite
+        has no such counters, so its virtual machine steps stand in for them.
+        """
+        work = [0]
+        connection.ensure_connection()
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(POSTGRES_LOAN_READS)
+                before = cursor.fetchone()[0]
+                yield work
+                cursor.execute(POSTGRES_LOAN_READS)
+                work[0] = cursor.fetchone()[0] - before
+        else:
+
+            def step():
+                work[0] += 1
+                return 0
+
+            connection.connection.set_progress_handler(step, 10)
+            try:
+                yield work
+            finally:
+                connection.connection.set_progress_handler(None, 0)
+
+    def test_overdue_tick_work_tracks_newly_overdue_loans(self):
+        """Test an overdue tick reads newly overdue loans, not every pending one"""
+        from library.tasks import check_overdue_loans
+
+        today = timezone.now().date()
+        check_overdue_loans()
+        with self.assertNumQueries(1):
+            self.assertEqual(check_overdue_loans()["sent"], 0)
+
+        work = []
+        for day, pending in enumerate((10, 2000), start=1):
+            # Loans not due yet sit in the pending reminder index, which a
+            # scan for due_date < today walks on every tick.
+            Loan.objects.bulk_create(
+                Loan(
+                    member=self.member,
+                    book=self.book,
+                    due_date=today + timedelta(days=day + 30),
+                )
+                for _ in range(pending)
+            )
+            Loan.objects.bulk_create(
+                Loan(
+                    member=self.member,
+                    book=self.book,
+                    due_date=today + timedelta(days=day),
+                )
+                for _ in range(2)
+            )
+            tomorrow = timezone.now() + timedelta(days=day + 1)
+            with patch("library.tasks.now", return_value=tomorrow):
+                with self.loan_reads() as reads:
+                    self.assertEqual(check_overdue_loans()["sent"], 2)
+            work.append(reads[0])
+
+        # 200 times the pending loans, about the same work per tick.
+        self.assertLess(work[1], work[0] * 2)
+
+    def test_overdue_watermark_rewinds_for_past_due_loans(self):
+        """Test a loan saved already past due is reminded by the next tick"""
+        from library.tasks import check_overdue_loans
+
+        check_overdue_loans()
+        loan = Loan.objects.create(
+            member=self.member,
+            book=self.book,
+            due_date=timezone.now().date() - timedelta(days=10),
+        )
+        self.assertEqual(check_overdue_loans()["sent"], 1)
+        loan.refresh_from_db()
+        self.assertTrue(loan.remainder_sent)
+
+    def test_dispatch_overdue_reminders_partitions(self):
+        """Test the coordinator fans out over partitions and sums their results"""
+        from library.tasks import (
+            dispatch_overdue_reminders,
+            summarize_overdue_reminders,
+        )
+        from library_system.celery import app
+
+        overdue = timezone.now().date() - timedelta(days=1)
+        Loan.objects.bulk_create(
+            Loan(member=self.member, book=self.book, due_date=overdue) for _ in range(7)
+        )
+
+        eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, "task_always_eager", eager)
+        with patch(
+            "library.tasks.summarize_overdue_reminders.run",
+            wraps=summarize_overdue_reminders.run,
+        ) as summarize, self.settings(OVERDUE_REMINDER_PARTITIONS=3):
+            dispatch_overdue_reminders()
+
+        results = summarize.call_args.args[0]
+        self.assertEqual(len(results), 3)
+        self.assertEqual(sum(result["sent"] for result in results), 7)
+        self.assertEqual(len(mail.outbox), 7)
+        self.assertFalse(
+            Loan.objects.filter(remainder_sent=False)
+            .exclude(due_date__gte=timezone.now().date())
+            .exists()
+        )
+
+    def test_export_loans_ndjson(self):
+        """Test loans stream as NDJSON rows with joined fields"""
+        Loan.objects.create(member=self.member, book=self.book, is_returned=True)
+        response = self.client.get("/api/loans/export/", {"is_returned": "false"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in response.streaming_content]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["id"], self.loan.id)
+        self.assertEqual(rows[0]["book__title"], "We Code & Track v1")
+        self.assertEqual(rows[0]["member__user__email"], "tracker@packer.com")
+        self.assertEqual(rows[0]["loan_date"], self.loan.loan_date.isoformat())
+
+    def test_export_loans_csv_date_range(self):
+        """Test loans stream as CSV filtered by a due date range"""
+        due = timezone.now().date() + timedelta(days=60)
+        late = Loan.objects.create(member=self.member, book=self.book, due_date=due)
+        response = self.client.get(
+            "/api/loans/export/",
+            {"output": "csv", "due_date__gte": due.isoformat()},
+        )
+        self.assertEqual(response["Content-Type"], "text/csv")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith("id,book_id,book__title"))
+        self.assertTrue(lines[1].startswith(f"{late.id},{self.book.id},"))
+
+    def test_archive_chunk_invalidates_once(self):
+        """Test archiving a chunk bumps the books cache once and frees holds"""
+        from library.archive import archive_chunk
+
+        today = timezone.now().date()
+        loans = Loan.objects.bulk_create(
+            Loan(
+                member=self.member,
+                book=self.book,
+                is_returned=True,
+                return_date=today - timedelta(days=400),
+            )
+            for _ in range(3)
+        )
+        hold = Hold.objects.create(
+            book=self.book,
+            member=self.member,
+            loan=loans[0],
+            allocated_at=timezone.now(),
+        )
+        active_loans = Member.objects.get(id=self.member.id).active_loans
+
+        with patch("library.archive.cache.invalidate") as invalidate:
+            self.assertEqual(archive_chunk(today, 10), 3)
+        invalidate.assert_called_once_with("books")
+        hold.refresh_from_db()
+        self.assertIsNone(hold.loan_id)
+        self.assertEqual(LoanArchive.objects.count(), 3)
+        self.assertEqual(
+            Member.objects.get(id=self.member.id).active_loans, active_loans
+        )
+
+    def test_export_invalid_output(self):
+        """Test an unknown export format is rejected"""
+        response = self.client.get("/api/loans/export/", {"output": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_archive_returned_loans(self):
+        """Test old returned loans move to the archive but stay readable"""
+        from library.tasks import archive_returned_loans
+
+        today = timezone.now().date()
+        old = Loan.objects.create(member=self.member, book=self.book)
+        recent = Loan.objects.create(member=self.member, book=self.book)
+        Loan.objects.filter(id=old.id).update(
+            is_returned=True, return_date=today - timedelta(days=400)
+        )
+        Loan.objects.filter(id=recent.id).update(
+            is_returned=True, return_date=today - timedelta(days=5)
+        )
+
+        with self.settings(LOAN_ARCHIVE_AFTER_DAYS=365, LOAN_ARCHIVE_CHUNK_SIZE=1):
+            self.assertEqual(archive_returned_loans(), 1)
+        self.assertFalse(Loan.objects.filter(id=old.id).exists())
+        self.assertEqual(LoanArchive.objects.get().id, old.id)
+
+        response = self.client.get("/api/loans/")
+        self.assertEqual(
+            [loan["id"] for loan in response.data["results"]],
+            [self.loan.id, old.id, recent.id],
+        )
+        with self.settings(FAST_LIST_SERIALIZATION=1):
+            fast = self.client.get("/api/loans/")
+        self.assertEqual(fast.content, response.content)
+        response = self.client.get(f"/api/loans/{old.id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["is_returned"])
+        self.assertEqual(response.data["book"]["id"], self.book.id)
+
+        response = self.client.get("/api/loans/", {"is_returned": "false"})
+        self.assertEqual(
+            [loan["id"] for loan in response.data["results"]], [self.loan.id]
+        )
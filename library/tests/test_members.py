@@ -1,6 +1,10 @@
+from io import StringIO
+
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from rest_framework import status
 
+from library import circulation
 from library.models import Loan, Member
 from library.serializers import MemberSerializer
 from library.tests.base import BaseLibraryAPITest
@@ -56,3 +60,74 @@ class MemberAPITests(BaseLibraryAPITest):
         self.assertEqual(member.user.username, "serialuser")
         serialized_data = MemberSerializer(member).data
         self.assertEqual(serialized_data["user"]["email"], "serial@example.com")
+
+    def assertActiveLoans(self, expected):
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.active_loans, expected)
+
+    def test_active_loans_follow_circulation(self):
+        """Test the active loan counter tracks checkout and return"""
+        self.assertActiveLoans(1)
+        circulation.checkout(self.book.id, self.member.id)
+        self.assertActiveLoans(2)
+        circulation.bulk_checkout(
+            [{"book_id": self.book.id, "member_id": self.member.id}]
+        )
+        self.assertActiveLoans(3)
+        circulation.return_book(self.book.id, self.member.id)
+        self.assertActiveLoans(2)
+
+    def test_active_loans_follow_loan_writes(self):
+        """Test the counter tracks loan updates and deletes, including cascades"""
+        response = self.client.patch(
+            f"/api/loans/{self.loan.id}/",
+            {"is_returned": True},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertActiveLoans(0)
+
+        loan = Loan.objects.create(member=self.member, book=self.book)
+        self.assertActiveLoans(1)
+        loan.delete()
+        self.assertActiveLoans(0)
+
+        Loan.objects.create(member=self.member, book=self.book)
+        self.book.delete()
+        self.assertActiveLoans(0)
+
+    def test_top_active_members(self):
+        """Test the leaderboard orders by active loans and honors limit"""
+        other = Member.objects.create(
+            user=User.objects.create_user(username="other", email="o@example.com")
+        )
+        circulation.checkout(self.book.id, other.id)
+        circulation.checkout(self.book.id, other.id)
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/top-active-members/", {"limit": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            [
+                {
+                    "id": other.id,
+                    "username": "other",
+                    "email": "o@example.com",
+                    "active_loans": 2,
+                }
+            ],
+        )
+
+        response = self.client.get("/api/top-active-members/")
+        self.assertEqual(
+            [row["id"] for row in response.data], [other.id, self.member.id]
+        )
+        response = self.client.get("/api/top-active-members/", {"limit": "x"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_active_loan_counts(self):
+        """Test the reconciliation command repairs drifted counters"""
+        Member.objects.update(active_loans=7)
+        call_command("rebuild_active_loan_counts", stdout=StringIO())
+        self.assertActiveLoans(1)
@@ -0,0 +1,76 @@
+import itertools
+import re
+from unittest.mock import patch
+
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework import status
+
+from library.middleware import PerformanceMiddleware
+from library.models import Book
+from library.tests.base import BaseLibraryAPITest
+
+
+class PerformanceMiddlewareTests(BaseLibraryAPITest):
+    def server_timing(self, response):
+        return dict(
+            re.findall(r"(\w+);dur=([\d.]+)", response["Server-Timing"])
+        ), re.search(r'desc="(\d+) queries"', response["Server-Timing"])
+
+    def test_server_timing_header(self):
+        """Test responses report DB, serializer, render and total time"""
+        response = self.client.get("/api/books/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timings, queries = self.server_timing(response)
+        self.assertEqual(set(timings), {"db", "serialize", "render", "total"})
+        self.assertGreater(int(queries.group(1)), 0)
+
+    def test_serializer_time_is_measured(self):
+        """Test serializer and values() list time land in the serialize phase"""
+        for fast in (0, 1):
+            with self.settings(FAST_LIST_SERIALIZATION=fast):
+                with patch("library.middleware.time.perf_counter") as clock:
+                    clock.side_effect = itertools.count()
+                    response = self.client.get("/api/loans/")
+            timings, _ = self.server_timing(response)
+            self.assertGreater(float(timings["serialize"]), 0)
+
+    def test_async_views_are_profiled(self):
+        """Test queries run by async views are counted"""
+        response = self.client.get("/api/async/books/")
+        _, queries = self.server_timing(response)
+        self.assertEqual(int(queries.group(1)), 2)
+
+    def test_metrics_endpoint(self):
+        """Test per-view histograms are exposed in Prometheus format"""
+        self.client.get(f"/api/books/{self.book.id}/")
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        body = response.content.decode()
+        self.assertIn("# TYPE library_request_duration_seconds histogram", body)
+        self.assertIn(
+            "# TYPE library_request_serialize_duration_seconds histogram", body
+        )
+        self.assertRegex(
+            body,
+            r'library_request_queries_count\{view="book-detail",method="GET"\} \d+',
+        )
+        self.assertIn(
+            'library_request_duration_seconds_bucket{view="book-detail",'
+            'method="GET",le="+Inf"}',
+            body,
+        )
+
+    def test_repeated_queries_are_flagged(self):
+        """Test the same query shape run repeatedly is logged as an N+1"""
+
+        def n_plus_one(request):
+            for book_id in range(6):
+                list(Book.objects.filter(id=book_id))
+            return HttpResponse()
+
+        middleware = PerformanceMiddleware(n_plus_one)
+        with self.assertLogs("library.middleware", "WARNING") as logs:
+            middleware(RequestFactory().get("/api/books/"))
+        self.assertIn("same query 6 times", logs.output[0])
@@ -0,0 +1,52 @@
+from rest_framework import status
+
+from library.models import Book
+from library.tests.base import BaseLibraryAPITest
+
+
+class PaginationTests(BaseLibraryAPITest):
+    def setUp(self):
+        super().setUp()
+        Book.objects.bulk_create(
+            Book(
+                title=f"Paged Book {i}",
+                author=self.author,
+                isbn=f"{i:013d}",
+                genre="fiction",
+            )
+            for i in range(6)
+        )
+
+    def test_page_numbers_by_default(self):
+        """Test page-number pagination stays the default and honors page_size"""
+        response = self.client.get("/api/books/", {"page": 2, "page_size": 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 7)
+        self.assertEqual(len(response.data["results"]), 3)
+
+    def test_cursor_pagination_walks_all_rows(self):
+        """Test following keyset cursors visits every book once in id order"""
+        url, params, seen = "/api/books/", {"pagination": "cursor", "page_size": 3}, []
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            seen.extend(book["id"] for book in response.data["results"])
+            url, params = response.data["next"], None
+        self.assertEqual(
+            seen, list(Book.objects.order_by("id").values_list("id", flat=True))
+        )
+
+    def test_cursor_pagination_skips_count(self):
+        """Test a keyset page is served by a single query"""
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                "/api/books/", {"pagination": "cursor", "page_size": 2}
+            )
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIn("cursor=", response.data["next"])
+
+    def test_invalid_cursor(self):
+        """Test a tampered cursor token is rejected"""
+        response = self.client.get("/api/loans/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
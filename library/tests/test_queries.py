@@ -0,0 +1,53 @@
+from django.contrib.auth.models import User
+
+from library.mixins import eager_loading_plan
+from library.models import Author, Book, Loan, Member
+from library.serializers import BookSerializer, LoanSerializer, MemberSerializer
+from library.tests.base import BaseLibraryAPITest
+
+
+class EagerLoadingTests(BaseLibraryAPITest):
+    def setUp(self):
+        super().setUp()
+        for i in range(12):
+            user = User.objects.create_user(
+                username=f"reader{i}", email=f"reader{i}@example.com"
+            )
+            member = Member.objects.create(user=user)
+            author = Author.objects.create(first_name=f"First{i}", last_name="Last")
+            book = Book.objects.create(
+                title=f"Book {i}", author=author, isbn=f"{i:013d}", genre="fiction"
+            )
+            Loan.objects.create(book=book, member=member)
+
+    def assertConstantQueries(self, url):
+        with self.assertNumQueries(2):
+            self.client.get(url, {"page_size": 2})
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {"page_size": 10})
+        self.assertEqual(len(response.data["results"]), 10)
+
+    def test_plans_follow_nested_serializers(self):
+        """Test the planner joins every nested forward relation"""
+        self.assertEqual(eager_loading_plan(BookSerializer), (("author",), ()))
+        self.assertEqual(eager_loading_plan(MemberSerializer), (("user",), ()))
+        self.assertEqual(
+            eager_loading_plan(LoanSerializer),
+            (("book", "book__author", "member", "member__user"), ()),
+        )
+
+    def test_list_loans_constant_queries(self):
+        """Test loan pages cost the same queries whatever their size"""
+        self.assertConstantQueries("/api/loans/")
+
+    def test_list_members_constant_queries(self):
+        """Test member pages cost the same queries whatever their size"""
+        self.assertConstantQueries("/api/members/")
+
+    def test_list_books_constant_queries(self):
+        """Test book pages cost the same queries whatever their size"""
+        self.assertConstantQueries("/api/books/")
+
+    def test_list_authors_constant_queries(self):
+        """Test author pages cost the same queries whatever their size"""
+        self.assertConstantQueries("/api/authors/")
@@ -0,0 +1,101 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework import status
+
+from library import rollups
+from library.models import CirculationRollup, Loan, Member
+from library.tasks import update_circulation_rollups
+from library.tests.base import BaseLibraryAPITest
+
+
+class CirculationStatsTests(BaseLibraryAPITest):
+    def setUp(self):
+        super().setUp()
+        self.today = timezone.now().date()
+        veteran = Member.objects.create(
+            user=User.objects.create_user(username="veteran", email="v@example.com")
+        )
+        Member.objects.filter(id=veteran.id).update(membership_date=date(2024, 1, 15))
+        self.returned = Loan.objects.create(member=self.member, book=self.book)
+        self.kept = Loan.objects.create(member=veteran, book=self.book)
+        Loan.objects.filter(id=self.loan.id).update(
+            loan_date=self.today - timedelta(days=4)
+        )
+        Loan.objects.filter(id__in=[self.returned.id, self.kept.id]).update(
+            loan_date=self.today - timedelta(days=3)
+        )
+        Loan.objects.filter(id=self.returned.id).update(
+            is_returned=True, return_date=self.today - timedelta(days=2)
+        )
+
+    def test_rollups_count_closed_days_once(self):
+        """Test rollups count checkouts and returns of closed days incrementally"""
+        self.assertEqual(update_circulation_rollups(), 4)
+        self.assertEqual(update_circulation_rollups(), 0)
+        self.assertEqual(rollups.complete_through(), self.today - timedelta(days=1))
+        self.assertEqual(
+            sum(CirculationRollup.objects.values_list("checkouts", flat=True)), 3
+        )
+
+        # The next day, today's loan is counted without recounting the rest.
+        Loan.objects.create(member=self.member, book=self.book)
+        tomorrow = self.today + timedelta(days=1)
+        self.assertEqual(rollups.update_chunk(tomorrow, 100), 1)
+        self.assertEqual(rollups.update_chunk(tomorrow, 100), 0)
+        self.assertIsNone(rollups.update_chunk(tomorrow, 100))
+        self.assertEqual(
+            sum(CirculationRollup.objects.values_list("checkouts", flat=True)), 4
+        )
+
+    def test_circulation_stats_by_cohort(self):
+        """Test the stats endpoint splits daily rollups by member cohort"""
+        update_circulation_rollups()
+        response = self.client.get(
+            "/api/stats/circulation/",
+            {
+                "by": "cohort",
+                "genre": "biography",
+                "start": (self.today - timedelta(days=3)).isoformat(),
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["complete_through"], self.today - timedelta(days=1)
+        )
+        month = self.today.replace(day=1)
+        self.assertEqual(
+            response.data["results"],
+            [
+                {
+                    "day": self.today - timedelta(days=3),
+                    "cohort": date(2024, 1, 1),
+                    "checkouts": 1,
+                    "returns": 0,
+                },
+                {
+                    "day": self.today - timedelta(days=3),
+                    "cohort": month,
+                    "checkouts": 1,
+                    "returns": 0,
+                },
+                {
+                    "day": self.today - timedelta(days=2),
+                    "cohort": month,
+                    "checkouts": 0,
+                    "returns": 1,
+                },
+            ],
+        )
+
+    def test_circulation_stats_invalid_query(self):
+        """Test the stats endpoint rejects unknown dimensions and bad ranges"""
+        for params in (
+            {"by": "isbn"},
+            {"start": "2024-02-01", "end": "2024-01-01"},
+            {"start": "yesterday"},
+            {"author": "abc"},
+        ):
+            response = self.client.get("/api/stats/circulation/", params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,6 +1,7 @@
-from datetime import timedelta
+from datetime import date, timedelta
 
-from django.db.models import Count, Q
+from django.conf import settings
+from django.db.models import Sum
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
@@ -8,78 +9,239 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Author, Book, Loan, Member
+from . import availability, circulation, exports, rollups
+from .mixins import (
+    BatchMixin,
+    CachedResponseMixin,
+    EagerLoadingMixin,
+    FastListMixin,
+)
+from .models import Author, Book, CirculationRollup, Loan, LoanHistory, Member
+from .search import search_book_ids
 from .serializers import (
     AuthorSerializer,
     BookSerializer,
     LoanSerializer,
     MemberSerializer,
 )
-from .tasks import send_loan_notification
 
+AVAILABILITY_MAX_BOOKS = 500
+
+
+def query_limit(params, default, maximum):
+    try:
+        limit = int(params.get("limit", default))
+    except ValueError:
+        limit = 0
+    if not 0 < limit <= maximum:
+        raise ValueError(f"limit must be between 1 and {maximum}")
+    return limit
+
+
+def query_date(params, name, default):
+    try:
+        return date.fromisoformat(params[name]) if name in params else default
+    except ValueError:
+        raise ValueError(f"{name} must be a YYYY-MM-DD date")
 
-class AuthorViewSet(viewsets.ModelViewSet):
+
+class AuthorViewSet(
+    CachedResponseMixin,
+    BatchMixin,
+    FastListMixin,
+    EagerLoadingMixin,
+    viewsets.ModelViewSet,
+):
+    cache_namespaces = ("authors",)
     queryset = Author.objects.all().order_by("id")
     serializer_class = AuthorSerializer
 
 
-class BookViewSet(viewsets.ModelViewSet):
-    queryset = Book.objects.select_related("author").all().order_by("id")
+class BookViewSet(
+    CachedResponseMixin,
+    BatchMixin,
+    FastListMixin,
+    EagerLoadingMixin,
+    viewsets.ModelViewSet,
+):
+    cache_namespaces = ("authors", "books")
+    queryset = Book.objects.all().order_by("id")
     serializer_class = BookSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["genre", "author__last_name"]
 
-    @action(detail=True, methods=["post"])
-    def loan(self, request, pk=None):
-        book = self.get_object()
-        if book.available_copies < 1:
+    def batch_written(self, books):
+        super().batch_written(books)
+        availability.refresh([book.id for book in books])
+        if self.request.method == "PATCH":
+            # Only updated books can have a waitlist to serve.
+            circulation.allocate_waiting(
+                Book.objects.filter(id__in=[book.id for book in books])
+            )
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        text = request.query_params.get("q", "").strip()
+        if not text:
             return Response(
-                {"error": "No available copies."}, status=status.HTTP_400_BAD_REQUEST
+                {"error": "Query parameter q is required."},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-        member_id = request.data.get("member_id")
         try:
-            member = Member.objects.get(id=member_id)
-        except Member.DoesNotExist:
+            limit = query_limit(request.query_params, default=20, maximum=100)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        ids = search_book_ids(text, limit)
+        books = self.get_queryset().in_bulk(ids)
+        serializer = self.get_serializer(
+            [books[book_id] for book_id in ids if book_id in books], many=True
+        )
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["get"])
+    def availability(self, request):
+        isbns = list(dict.fromkeys(request.query_params.getlist("isbn")))
+        try:
+            ids = list(dict.fromkeys(map(int, request.query_params.getlist("id"))))
+        except ValueError:
+            return Response(
+                {"error": "id must be an integer."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not 0 < len(ids) + len(isbns) <= AVAILABILITY_MAX_BOOKS:
             return Response(
-                {"error": "Member does not exist."}, status=status.HTTP_400_BAD_REQUEST
+                {
+                    "error": f"Pass between 1 and {AVAILABILITY_MAX_BOOKS} "
+                    "id or isbn parameters."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
             )
-        loan = Loan.objects.create(book=book, member=member)
-        book.available_copies -= 1
-        book.save()
-        send_loan_notification.delay(loan.id)
+        results, missing = availability.lookup(ids, isbns)
+        return Response({"results": results, "missing": missing})
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        try:
+            output = exports.export_output(request)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return exports.stream_export(
+            self.filter_queryset(self.get_queryset()),
+            exports.BOOK_EXPORT_FIELDS,
+            output,
+            "books",
+        )
+
+    @action(detail=True, methods=["post"])
+    def loan(self, request, pk=None):
+        book = self.get_object()
+        try:
+            circulation.checkout(book.id, request.data.get("member_id"))
+        except circulation.CirculationError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         return Response(
             {"status": "Book loaned successfully."}, status=status.HTTP_201_CREATED
         )
 
     @action(detail=True, methods=["post"])
-    def return_book(self, request, pk=None):
+    def hold(self, request, pk=None):
         book = self.get_object()
-        member_id = request.data.get("member_id")
         try:
-            loan = Loan.objects.get(book=book, member__id=member_id, is_returned=False)
-        except Loan.DoesNotExist:
-            return Response(
-                {"error": "Active loan does not exist."},
-                status=status.HTTP_400_BAD_REQUEST,
+            hold, position = circulation.place_hold(
+                book.id, request.data.get("member_id")
             )
-        loan.is_returned = True
-        loan.return_date = timezone.now().date()
-        loan.save()
-        book.available_copies += 1
-        book.save()
+        except circulation.CirculationError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {
+                "status": "Hold placed successfully.",
+                "hold_id": hold.id,
+                "position": position,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=True, methods=["post"])
+    def return_book(self, request, pk=None):
+        book = self.get_object()
+        try:
+            circulation.return_book(book.id, request.data.get("member_id"))
+        except circulation.CirculationError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         return Response(
             {"status": "Book returned successfully."}, status=status.HTTP_200_OK
         )
 
 
-class MemberViewSet(viewsets.ModelViewSet):
+class MemberViewSet(FastListMixin, EagerLoadingMixin, viewsets.ModelViewSet):
     queryset = Member.objects.all().order_by("id")
     serializer_class = MemberSerializer
 
 
-class LoanViewSet(viewsets.ModelViewSet):
+class LoanViewSet(FastListMixin, EagerLoadingMixin, viewsets.ModelViewSet):
     queryset = Loan.objects.all().order_by("id")
+    history_queryset = LoanHistory.objects.all().order_by("id")
+    history_actions = ("list", "retrieve", "export")
     serializer_class = LoanSerializer
+    filterset_fields = {
+        "is_returned": ["exact"],
+        "book": ["exact"],
+        "member": ["exact"],
+        "loan_date": ["gte", "lte"],
+        "due_date": ["gte", "lte"],
+        "return_date": ["gte", "lte"],
+    }
+
+    def get_queryset(self):
+        # Reads also see loans moved to the archive; writes only touch Loan.
+        if self.action in self.history_actions:
+            queryset = self.history_queryset
+        else:
+            queryset = self.queryset
+        return self.eager_load(queryset.all())
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        try:
+            output = exports.export_output(request)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return exports.stream_export(
+            self.filter_queryset(self.get_queryset()),
+            exports.LOAN_EXPORT_FIELDS,
+            output,
+            "loans",
+        )
+
+    @action(detail=False, methods=["post"])
+    def bulk_checkout(self, request):
+        items = request.data
+        if isinstance(items, dict):
+            items = items.get("loans")
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"error": "Expected a non-empty list of loans."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > settings.BATCH_MAX_ROWS:
+            return Response(
+                {"error": f"At most {settings.BATCH_MAX_ROWS} loans per batch."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = circulation.bulk_checkout(items)
+        loaned = sum("loan_id" in result for result in results)
+        if loaned == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif loaned:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(
+            {"loaned": loaned, "failed": len(results) - loaned, "results": results},
+            status=response_status,
+        )
 
     @action(detail=True, methods=["post"])
     def extend_due_date(self, request, pk=None):
@@ -120,19 +282,88 @@ class LoanViewSet(viewsets.ModelViewSet):
 
 
 class TopActiveMembersView(APIView):
+    default_limit = 5
+    max_limit = 1000
+
     def get(self, request):
-        members = Member.objects.annotate(
-            active_loans=Count("loans", filter=Q(loans__is_returned=False))
-        ).order_by("-active_loans")[:5]
+        try:
+            limit = query_limit(
+                request.query_params, self.default_limit, self.max_limit
+            )
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        members = Member.objects.order_by("-active_loans", "id").values(
+            "id", "user__username", "user__email", "active_loans"
+        )[:limit]
 
         return Response(
             [
                 {
-                    "id": member.id,
-                    "username": member.user.username,
-                    "email": member.user.email,
-                    "active_loans": member.active_loans,
+                    "id": member["id"],
+                    "username": member["user__username"],
+                    "email": member["user__email"],
+                    "active_loans": member["active_loans"],
                 }
                 for member in members
             ]
         )
+
+
+class CirculationStatsView(APIView):
+    """Daily checkouts and returns, read from the circulation rollups only.
+
+    ``?by=genre,author,cohort`` splits each day by any of those dimensions;
+    ``genre`` and ``author`` filter.
+    """
+
+    dimensions = ("genre", "author", "cohort")
+    default_days = 30
+    max_days = 366
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            end = query_date(params, "end", timezone.now().date())
+            start = query_date(
+                params, "start", end - timedelta(days=self.default_days - 1)
+            )
+            if not timedelta(0) <= end - start < timedelta(days=self.max_days):
+                raise ValueError(
+                    f"start must be at most {self.max_days - 1} days before end"
+                )
+            by = [name for name in params.get("by", "").split(",") if name]
+            if not set(by) <= set(self.dimensions):
+                raise ValueError(f"by must be among {', '.join(self.dimensions)}")
+            filters = {"day__range": (start, end)}
+            if "genre" in params:
+                filters["genre"] = params["genre"]
+            if "author" in params:
+                if not params["author"].isdigit():
+                    raise ValueError("author must be an author id")
+                filters["author_id"] = int(params["author"])
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = (
+            CirculationRollup.objects.filter(**filters)
+            .values("day", *by)
+            .annotate(total_checkouts=Sum("checkouts"), total_returns=Sum("returns"))
+            .order_by("day", *by)
+        )
+        return Response(
+            {
+                "start": start,
+                "end": end,
+                "complete_through": rollups.complete_through(),
+                "results": [
+                    {
+                        "day": row["day"],
+                        **{name: row[name] for name in by},
+                        "checkouts": row["total_checkouts"],
+                        "returns": row["total_returns"],
+                    }
+                    for row in rows
+                ],
+            }
+        )
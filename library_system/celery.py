@@ -12,7 +12,19 @@ app.autodiscover_tasks()
 
 app.conf.beat_schedule = {
     "check-overdue-loans": {
-        "task": "library.tasks.check_overdue_loans",
+        "task": "library.tasks.dispatch_overdue_reminders",
         "schedule": (crontab(minute="*/1")),
-    }
+    },
+    "relay-outbox": {
+        "task": "library.tasks.relay_outbox",
+        "schedule": int(os.getenv("OUTBOX_RELAY_INTERVAL", 5)),
+    },
+    "archive-returned-loans": {
+        "task": "library.tasks.archive_returned_loans",
+        "schedule": (crontab(hour=3, minute=0)),
+    },
+    "update-circulation-rollups": {
+        "task": "library.tasks.update_circulation_rollups",
+        "schedule": (crontab(minute=10)),
+    },
 }
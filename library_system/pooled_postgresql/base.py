@@ -0,0 +1,76 @@
+"""PostgreSQL backend that keeps a per-process pool of psycopg2 connections.
+
+Django opens a connection per request (or per task in a Celery worker) and
+closes it at the end. With this backend "closing" hands the connection back
+to the pool and the next request reuses it, skipping the TCP/TLS handshake
+and authentication round trips.
+
+Configure it with a ``POOL`` dict in the database settings::
+
+    "POOL": {"MIN_SIZE": 2, "MAX_SIZE": 10, "TIMEOUT": 10,
+             "HEALTH_CHECK_INTERVAL": 30}
+
+``CONN_MAX_AGE`` should stay 0: the pool, not the thread, owns connections.
+"""
+
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from .creation import DatabaseCreation
+from .pool import ConnectionPool, abandon, get_pool, owning_pool
+
+POOL_DEFAULTS = {
+    "MIN_SIZE": 0,
+    "MAX_SIZE": 10,
+    "TIMEOUT": 10,
+    "HEALTH_CHECK_INTERVAL": 30,
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    pool = None
+
+    def pool_options(self):
+        return {**POOL_DEFAULTS, **self.settings_dict.get("POOL", {})}
+
+    def get_pool(self, conn_params):
+        options = self.pool_options()
+        key = (self.alias, repr(sorted(conn_params.items())))
+        return get_pool(
+            key,
+            lambda: ConnectionPool(
+                lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+                min_size=options["MIN_SIZE"],
+                max_size=options["MAX_SIZE"],
+                timeout=options["TIMEOUT"],
+                health_check_interval=options["HEALTH_CHECK_INTERVAL"],
+            ),
+        )
+
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+        connection = self.pool.checkout()
+        # The parent sets this while connecting; reused connections keep the
+        # level they were opened with.
+        self.isolation_level = IsolationLevel(
+            self.settings_dict["OPTIONS"].get(
+                "isolation_level", IsolationLevel.READ_COMMITTED
+            )
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        if not owning_pool(self.pool):
+            # Inherited across a fork: the socket belongs to the parent.
+            abandon(self.connection)
+        elif self.in_atomic_block:
+            # Closed mid-transaction: not safe to share, really close it.
+            self.pool.forget()
+            with self.wrap_database_errors:
+                self.connection.close()
+        else:
+            self.pool.checkin(self.connection)
@@ -0,0 +1,12 @@
+from django.db.backends.postgresql.creation import (
+    DatabaseCreation as PostgresDatabaseCreation,
+)
+
+from .pool import close_idle_connections
+
+
+class DatabaseCreation(PostgresDatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled sessions would otherwise block DROP DATABASE.
+        close_idle_connections()
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,184 @@
+import os
+import threading
+import time
+from collections import Counter, deque
+
+from psycopg2 import Error as DatabaseError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+
+class PoolTimeout(DatabaseError):
+    pass
+
+
+class ConnectionPool:
+    """A bounded, thread-safe pool of psycopg2 connections for one process.
+
+    ``checkout`` hands out an idle connection after a health check, opens a new
+    one while the pool is below ``max_size`` and otherwise waits up to
+    ``timeout`` seconds for one to be returned.
+    """
+
+    def __init__(self, connect, min_size, max_size, timeout, health_check_interval):
+        self.connect = connect
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size, 1)
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.pid = os.getpid()
+        self.idle = deque()
+        self.size = 0
+        self.metrics = Counter()
+        self.condition = threading.Condition()
+
+    def checkout(self):
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        with self.condition:
+            self.metrics["checkouts"] += 1
+            while True:
+                while self.idle:
+                    connection, returned_at = self.idle.pop()
+                    if self.healthy(connection, returned_at):
+                        return connection
+                    self.discard(connection)
+                if self.size < self.max_size:
+                    self.size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.metrics["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"No database connection available within {self.timeout}s "
+                        f"(pool size {self.max_size})"
+                    )
+                if not waited:
+                    self.metrics["waits"] += 1
+                    waited = True
+                self.condition.wait(remaining)
+
+        # Connect outside the lock so slow handshakes don't stall other threads.
+        try:
+            connection = self.connect()
+        except Exception:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+        with self.condition:
+            self.metrics["created"] += 1
+        self.fill()
+        return connection
+
+    def checkin(self, connection):
+        if connection.closed or (
+            connection.get_transaction_status() != TRANSACTION_STATUS_IDLE
+            and not self.rollback(connection)
+        ):
+            with self.condition:
+                self.discard(connection)
+                self.condition.notify()
+            return
+        with self.condition:
+            self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+
+    def forget(self):
+        # A checked-out connection was closed by its user instead of returned.
+        with self.condition:
+            self.size -= 1
+            self.metrics["discarded"] += 1
+            self.condition.notify()
+
+    def fill(self):
+        while True:
+            with self.condition:
+                if self.size >= self.min_size:
+                    return
+                self.size += 1
+            try:
+                connection = self.connect()
+            except Exception:
+                with self.condition:
+                    self.size -= 1
+                return
+            with self.condition:
+                self.metrics["created"] += 1
+                self.idle.appendleft((connection, time.monotonic()))
+                self.condition.notify()
+
+    def healthy(self, connection, returned_at):
+        if connection.closed:
+            return False
+        if time.monotonic() - returned_at < self.health_check_interval:
+            return True
+        self.metrics["health_checks"] += 1
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except DatabaseError:
+            return False
+        return True
+
+    def rollback(self, connection):
+        try:
+            connection.rollback()
+        except DatabaseError:
+            return False
+        return True
+
+    def discard(self, connection):
+        # Caller holds the lock.
+        self.size -= 1
+        self.metrics["discarded"] += 1
+        try:
+            connection.close()
+        except DatabaseError:
+            pass
+
+    def close_idle(self):
+        with self.condition:
+            while self.idle:
+                self.discard(self.idle.pop()[0])
+
+    def stats(self):
+        with self.condition:
+            return {**self.metrics, "size": self.size, "idle": len(self.idle)}
+
+
+# Pools are per process: a forked child (e.g. a Celery prefork worker) never
+# reuses its parent's sockets. Inherited pools are kept referenced, never
+# closed, so garbage collection cannot send a terminate on the parent's behalf.
+pools = {}
+inherited = []
+lock = threading.Lock()
+
+
+def get_pool(key, factory):
+    pid = os.getpid()
+    with lock:
+        stale = [name for name, pool in pools.items() if pool.pid != pid]
+        for name in stale:
+            inherited.append(pools.pop(name))
+        if key not in pools:
+            pools[key] = factory()
+        return pools[key]
+
+
+def abandon(connection):
+    with lock:
+        inherited.append(connection)
+
+
+def owning_pool(pool):
+    return pool is not None and pool.pid == os.getpid()
+
+
+def close_idle_connections():
+    for pool in list(pools.values()):
+        if owning_pool(pool):
+            pool.close_idle()
+
+
+def pool_stats():
+    return {name: pool.stats() for name, pool in pools.items() if owning_pool(pool)}
@@ -6,6 +6,17 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 
 DEFAULT_LOAN_PERIOD_DAYS = int(os.getenv("DEFAULT_LOAN_PERIOD_DAYS"))
+OVERDUE_REMINDER_CHUNK_SIZE = int(os.getenv("OVERDUE_REMINDER_CHUNK_SIZE", 500))
+OVERDUE_REMINDER_PARTITIONS = int(os.getenv("OVERDUE_REMINDER_PARTITIONS", 8))
+OVERDUE_REMINDER_CLAIM_TIMEOUT = int(os.getenv("OVERDUE_REMINDER_CLAIM_TIMEOUT", 600))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 500))
+LOAN_ARCHIVE_AFTER_DAYS = int(os.getenv("LOAN_ARCHIVE_AFTER_DAYS", 365))
+LOAN_ARCHIVE_CHUNK_SIZE = int(os.getenv("LOAN_ARCHIVE_CHUNK_SIZE", 1000))
+ROLLUP_CHUNK_SIZE = int(os.getenv("ROLLUP_CHUNK_SIZE", 10000))
+BATCH_MAX_ROWS = int(os.getenv("BATCH_MAX_ROWS", 10000))
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 2000))
+FAST_LIST_SERIALIZATION = int(os.getenv("FAST_LIST_SERIALIZATION", 0))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", 5))
 
 # Security
 SECRET_KEY = os.getenv("SECRET_KEY", "your-default-secret-key")
@@ -30,6 +41,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "library.middleware.PerformanceMiddleware",
     "corsheaders.middleware.CorsMiddleware",  # CORS
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -64,14 +76,32 @@ TEMPLATES = [
 WSGI_APPLICATION = "library_system.wsgi.application"
 
 # Database
+# DB_POOL=1 keeps a per-process pool of connections (see
+# library_system/pooled_postgresql); with DB_POOL=0 Django's persistent
+# connections (CONN_MAX_AGE) are used instead.
+DB_POOL = int(os.getenv("DB_POOL", 1))
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": (
+            "library_system.pooled_postgresql"
+            if DB_POOL
+            else "django.db.backends.postgresql"
+        ),
         "NAME": os.getenv("POSTGRES_DB"),
         "USER": os.getenv("POSTGRES_USER"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
         "HOST": os.getenv("DB_HOST"),
         "PORT": os.getenv("DB_PORT"),
+        "CONN_MAX_AGE": 0 if DB_POOL else int(os.getenv("CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
+        "POOL": {
+            "MIN_SIZE": int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+            "MAX_SIZE": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            "TIMEOUT": int(os.getenv("DB_POOL_TIMEOUT", 10)),
+            "HEALTH_CHECK_INTERVAL": int(
+                os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", 30)
+            ),
+        },
         "TEST": {
             "NAME": os.getenv("POSTGRES_TEST_DB"),
             "USER": os.getenv("POSTGRES_USER"),
@@ -82,6 +112,20 @@ DATABASES = {
     }
 }
 
+# Cache
+CACHES = {
+    "default": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("CACHE_URL"),
+        }
+        if os.getenv("CACHE_URL")
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    )
+}
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", 300))
+AVAILABILITY_CACHE_TIMEOUT = int(os.getenv("AVAILABILITY_CACHE_TIMEOUT", 300))
+
 # Password Validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -114,7 +158,11 @@ REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_RENDERER_CLASSES": [
+        "library.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PAGINATION_CLASS": "library.pagination.LibraryPagination",
     "PAGE_SIZE": 10,
     "PAGE_SIZE_QUERY_PARAM": "page_size",
 }
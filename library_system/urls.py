@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.urls import include, path
 from rest_framework import routers
 
-from library import views
+from library import async_views, metrics, views
 
 router = routers.DefaultRouter()
 router.register(r"authors", views.AuthorViewSet)
@@ -12,10 +12,33 @@ router.register(r"loans", views.LoanViewSet)
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", metrics.metrics_view, name="metrics"),
     path("api/", include(router.urls)),
     path(
         "api/top-active-members/",
         views.TopActiveMembersView.as_view(),
         name="top-active-members",
     ),
+    path(
+        "api/stats/circulation/",
+        views.CirculationStatsView.as_view(),
+        name="circulation-stats",
+    ),
+    path("api/async/books/", async_views.book_list, name="async-book-list"),
+    path(
+        "api/async/books/<int:pk>/",
+        async_views.book_detail,
+        name="async-book-detail",
+    ),
+    path("api/async/authors/", async_views.author_list, name="async-author-list"),
+    path(
+        "api/async/authors/<int:pk>/",
+        async_views.author_detail,
+        name="async-author-detail",
+    ),
+    path(
+        "api/async/top-active-members/",
+        async_views.top_active_members,
+        name="async-top-active-members",
+    ),
 ]